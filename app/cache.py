@@ -0,0 +1,134 @@
+"""
+In-process read-through cache for reference entities.
+
+Rows and list pages returned by the crud.get_* functions are kept in a
+size-bounded LRU with a TTL. The crud write functions invalidate the row they
+touch together with every cached list page of the same table. Each process
+has its own cache, so the TTL bounds how stale another worker can be.
+Reads from a replica session (info["replica_lag"]) are not cached while the
+table has been written more recently than the replication lag, so a lagging
+replica cannot put back a row that was just invalidated.
+Dependencies: none.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "2048"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+
+
+class QueryCache:
+    def __init__(self, maxsize: int = CACHE_MAXSIZE, ttl: float = CACHE_TTL, enabled: bool = CACHE_ENABLED):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._written_at = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def generation(self, table: str) -> int:
+        return self._generations.get(table, 0)
+
+    def get(self, key):
+        """
+        Devuelve (True, valor) si la clave está en caché y no ha caducado
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, generation: int):
+        """
+        Guarda el valor salvo que la tabla se haya modificado desde que se
+        leyó (generation), para no volver a cachear una fila ya invalidada
+        """
+        with self._lock:
+            if generation != self.generation(key[0]):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, table: str, *row_key):
+        """
+        Elimina la fila indicada y todas las páginas de listado de la tabla;
+        sin row_key elimina todas las entradas de la tabla
+        """
+        with self._lock:
+            self._generations[table] = self.generation(table) + 1
+            self._written_at[table] = time.monotonic()
+            for key in list(self._entries):
+                if key[0] != table:
+                    continue
+                if not row_key or key[1] == "list" or key[2:] == row_key:
+                    del self._entries[key]
+
+    def written_within(self, table: str, seconds: float) -> bool:
+        written_at = self._written_at.get(table)
+        return written_at is not None and time.monotonic() - written_at < seconds
+
+    def clear(self):
+        with self._lock:
+            for table in self._generations:
+                self._generations[table] += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def cached(self, table: str, kind: str = "row"):
+        """
+        Decorador para las funciones de lectura de crud.py. kind="row" cachea
+        por los argumentos posicionales (la clave primaria) y kind="list" por
+        el nombre de la función y todos sus argumentos
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(db, *args, **kwargs):
+                if not self.enabled:
+                    return func(db, *args, **kwargs)
+                if kind == "row":
+                    key = (table, "row", *args, *kwargs.values())
+                else:
+                    key = (table, "list", func.__name__, args, tuple(sorted(kwargs.items())))
+                hit, value = self.get(key)
+                if hit:
+                    return value
+                generation = self.generation(table)
+                value = func(db, *args, **kwargs)
+                replica_lag = db.info.get("replica_lag")
+                if value is not None and not (replica_lag and self.written_within(table, replica_lag)):
+                    self.set(key, value, generation)
+                return value
+            return wrapper
+        return decorator
+
+
+cache = QueryCache()
@@ -1,103 +1,436 @@
+from sqlalchemy import Boolean, event, func, insert, literal_column, select, text, true, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from typing import List, Optional, Set
 from . import models, schemas
+from .cache import cache
+from .pagination import keyset_page
 from datetime import date
+from decimal import Decimal
+from operator import eq, ge, le
+import os
+
+BULK_CHUNK_SIZE = 1000
+# Máximo de claves por petición de batch-get (y por consulta IN)
+BATCH_GET_MAX = 1000
+# Mantener temporada_resumen en cada escritura y servir /stats/temporadas desde ella
+STATS_SUMMARY = os.getenv("STATS_SUMMARY", "false").lower() in ("1", "true", "yes")
+# Registrar cada escritura en la tabla cambio y servir /changes desde ella
+CHANGE_LOG = os.getenv("CHANGE_LOG", "false").lower() in ("1", "true", "yes")
+
+def _dialect_insert(db: Session, table):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    return insert(table)
+
+def _bulk_insert(db: Session, table, rows: List[dict], offset: int, key_columns, upsert: bool):
+    """
+    Inserta las filas en una sola sentencia multi-fila y devuelve el resultado
+    de cada una. Con upsert, los conflictos sobre key_columns actualizan la
+    fila existente (o la dejan intacta si no hay otras columnas)
+    """
+    if not upsert:
+        stmt = _dialect_insert(db, table).returning(*table.c, sort_by_parameter_order=True)
+        returned = db.execute(stmt, rows).all()
+        return [
+            {"index": i, "status": "created", "data": dict(r._mapping)}
+            for i, r in enumerate(returned, offset)
+        ]
+
+    keys = [tuple(row[c.key] for c in key_columns) for row in rows]
+    stmt = _dialect_insert(db, table)
+    key_names = {c.key for c in key_columns}
+    update_columns = [c.key for c in table.c if c.key not in key_names and not c.primary_key]
+    postgres = db.get_bind().dialect.name == "postgresql"
+    returning = list(table.c)
+    existing = set()
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={name: stmt.excluded[name] for name in update_columns}
+        )
+        if postgres:
+            # xmax = 0 solo en las filas que inserta esta misma sentencia: el
+            # estado no depende de una lectura previa que otra escritura adelante
+            returning.append(literal_column("(xmax = 0)", Boolean).label("inserted"))
+        else:
+            existing = {
+                tuple(r) for r in db.execute(
+                    select(*key_columns).where(tuple_(*key_columns).in_(keys))
+                )
+            }
+    else:
+        # DO NOTHING solo devuelve las filas insertadas
+        stmt = stmt.on_conflict_do_nothing(index_elements=key_columns)
+    returned, inserted = {}, set()
+    for r in db.execute(stmt.returning(*returning), rows):
+        mapping = r._mapping
+        key = tuple(mapping[c.key] for c in key_columns)
+        returned[key] = {c.key: mapping[c.key] for c in table.c}
+        if update_columns and (mapping["inserted"] if postgres else key not in existing):
+            inserted.add(key)
+    results = []
+    for i, (key, row) in enumerate(zip(keys, rows), offset):
+        if not update_columns:
+            status = "created" if key in returned else "unchanged"
+        else:
+            status = "created" if key in inserted else "updated"
+        results.append({"index": i, "status": status, "data": returned.get(key, row)})
+    return results
+
+def _bulk_write(
+    db: Session, table, rows: List[dict], key_columns, upsert: bool = False,
+    chunk_size: int = BULK_CHUNK_SIZE, mark=None
+):
+    """
+    Escribe las filas en transacciones de chunk_size filas. Si un bloque falla
+    por integridad (o repite claves en modo upsert) se reintenta fila a fila
+    con savepoints para informar el error de cada fila sin perder las demás.
+    mark(db, chunk) marca antes de cada bloque las temporadas de
+    temporada_resumen que cambian, para recalcularlas en el commit del bloque
+    """
+    results = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        if mark is not None:
+            mark(db, chunk)
+        keys = {tuple(row[c.key] for c in key_columns) for row in chunk}
+        if not upsert or len(keys) == len(chunk):
+            try:
+                chunk_results = _bulk_insert(db, table, chunk, start, key_columns, upsert)
+                _log_bulk_changes(db, table, chunk_results)
+                db.commit()
+                results.extend(chunk_results)
+                continue
+            except IntegrityError:
+                db.rollback()
+        chunk_results = []
+        for i, row in enumerate(chunk, start):
+            try:
+                with db.begin_nested():
+                    chunk_results.extend(_bulk_insert(db, table, [row], i, key_columns, upsert))
+            except IntegrityError as e:
+                detail = str(e.orig).splitlines()[0] if e.orig else str(e)
+                chunk_results.append({"index": i, "status": "error", "data": None, "detail": detail})
+        _log_bulk_changes(db, table, chunk_results)
+        db.commit()
+        results.extend(chunk_results)
+    cache.invalidate(table.name)
+    return results
+
+def _update_returning(db: Session, table, condition, values: dict, key: dict):
+    """
+    Actualiza en una sola sentencia y devuelve la fila leída de la base de
+    datos (None si no existe). Sin soporte de RETURNING se comprueba rowcount
+    """
+    stmt = table.update().where(condition).values(**values)
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(stmt.returning(*table.c)).first()
+    else:
+        row = {**key, **values} if db.execute(stmt).rowcount else None
+    if row is not None:
+        _log_update(db, table, key, row)
+    db.commit()
+    return row
+
+def _delete_returning(db: Session, table, condition, key: dict):
+    stmt = table.delete().where(condition)
+    if db.get_bind().dialect.delete_returning:
+        deleted = db.execute(stmt.returning(*table.primary_key.columns)).first() is not None
+    else:
+        deleted = db.execute(stmt).rowcount > 0
+    if deleted:
+        _log_change(db, table, "delete", key)
+    db.commit()
+    return deleted
+
+def export_select(table):
+    """
+    Consulta de exportación de una tabla completa, ordenada por clave primaria
+    """
+    return select(table).order_by(*table.primary_key.columns)
+
+def _labeled(table):
+    return [column.label(f"{table.name}__{column.key}") for column in table.c]
+
+def _unlabel(row, table):
+    mapping = row._mapping
+    return {column.key: mapping[f"{table.name}__{column.key}"] for column in table.c}
+
+def _rows_by_key(db: Session, table, key_columns, keys: list) -> dict:
+    """
+    Lee en una sola consulta (IN, o IN de tuplas con clave compuesta) las
+    filas de las claves indicadas y las devuelve en un dict clave -> fila
+    """
+    if not keys:
+        return {}
+    if len(key_columns) == 1:
+        rows = db.query(table).filter(key_columns[0].in_(keys)).all()
+        return {getattr(row, key_columns[0].key): row for row in rows}
+    rows = db.query(table).filter(tuple_(*key_columns).in_(keys)).all()
+    return {tuple(getattr(row, column.key) for column in key_columns): row for row in rows}
+
+def _apply_filters(query, allowed: dict, filters: dict):
+    """
+    Aplica los filtros de un listado; allowed asocia cada nombre de filtro
+    con su columna y operador. Los valores None se ignoran
+    """
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if name not in allowed:
+            raise ValueError(f"Filtro no válido: {name}")
+        column, op = allowed[name]
+        query = query.filter(op(column, value))
+    return query
+
+def _apply_sort(query, allowed: dict, sort: Optional[str], key_columns):
+    """
+    Ordena por una columna de la lista blanca ("-columna" en descendente) y
+    después por la clave primaria, para que el orden sea estable
+    """
+    if not sort:
+        return query.order_by(*key_columns)
+    name = sort[1:] if sort.startswith("-") else sort
+    if name not in allowed:
+        raise ValueError(f"Orden no válido: {sort}. Permitidos: {', '.join(sorted(allowed))}")
+    column = allowed[name]
+    return query.order_by(column.desc() if sort.startswith("-") else column.asc(), *key_columns)
+
+ESTADIO_FILTERS = {
+    "ciudad": (models.estadio.c.ciudad, eq),
+    "pais": (models.estadio.c.pais, eq),
+    "capacidad_min": (models.estadio.c.capacidad, ge),
+    "capacidad_max": (models.estadio.c.capacidad, le),
+}
+ESTADIO_SORT = {
+    "nombre": models.estadio.c.nombre,
+    "capacidad": models.estadio.c.capacidad,
+}
+EQUIPO_FILTERS = {
+    "estadio_id": (models.equipo.c.estadio_id, eq),
+    "presupuesto_min": (models.equipo.c.presupuesto, ge),
+    "presupuesto_max": (models.equipo.c.presupuesto, le),
+    "fecha_fundacion_min": (models.equipo.c.fecha_fundacion, ge),
+    "fecha_fundacion_max": (models.equipo.c.fecha_fundacion, le),
+}
+EQUIPO_SORT = {
+    "nombre": models.equipo.c.nombre,
+    "presupuesto": models.equipo.c.presupuesto,
+    "fecha_fundacion": models.equipo.c.fecha_fundacion,
+}
+TEMPORADA_FILTERS = {
+    "año_inicio": (models.temporada.c["año_inicio"], eq),
+    "año_inicio_min": (models.temporada.c["año_inicio"], ge),
+    "año_inicio_max": (models.temporada.c["año_inicio"], le),
+}
+TEMPORADA_SORT = {
+    "año_inicio": models.temporada.c["año_inicio"],
+}
+EQUIPO_TEMPORADA_FILTERS = {
+    "equipo_id": (models.equipo_temporada.c.equipo_id, eq),
+    "temporada_id": (models.equipo_temporada.c.temporada_id, eq),
+}
+EQUIPO_TEMPORADA_SORT = {
+    "temporada_id": models.equipo_temporada.c.temporada_id,
+}
 
 # Estadios
+@cache.cached("estadio")
 def get_estadio(db: Session, estadio_id: int):
     return db.query(models.estadio).filter(models.estadio.c.estadio_id == estadio_id).first()
 
-def get_estadios(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.estadio).offset(skip).limit(limit).all()
+@cache.cached("estadio", "list")
+def get_estadios(db: Session, skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters):
+    query = _apply_filters(db.query(models.estadio), ESTADIO_FILTERS, filters)
+    query = _apply_sort(query, ESTADIO_SORT, sort, [models.estadio.c.estadio_id])
+    return query.offset(skip).limit(limit).all()
+
+@cache.cached("estadio", "list")
+def get_estadios_page(db: Session, cursor: Optional[str] = None, limit: int = 100, **filters):
+    query = _apply_filters(db.query(models.estadio), ESTADIO_FILTERS, filters)
+    return keyset_page(query, [models.estadio.c.estadio_id], cursor, limit)
+
+def get_estadios_by_ids(db: Session, estadio_ids: List[int]) -> dict:
+    return _rows_by_key(db, models.estadio, [models.estadio.c.estadio_id], estadio_ids)
 
 def create_estadio(db: Session, estadio: schemas.EstadioCreate):
     db_estadio = dict(estadio.dict())
     result = db.execute(models.estadio.insert().values(**db_estadio))
-    db.commit()
     db_estadio['estadio_id'] = result.inserted_primary_key[0]
+    _log_change(db, models.estadio, "insert", {"estadio_id": db_estadio['estadio_id']}, db_estadio)
+    db.commit()
+    cache.invalidate("estadio", db_estadio['estadio_id'])
     return db_estadio
 
+def create_estadios_bulk(db: Session, estadios: List[schemas.EstadioCreate], upsert: bool = False):
+    rows = [estadio.dict() for estadio in estadios]
+    mark = _mark_resumen_by_nombre(models.estadio) if upsert else None
+    return _bulk_write(db, models.estadio, rows, [models.estadio.c.nombre], upsert, mark=mark)
+
 def update_estadio(db: Session, estadio_id: int, estadio: schemas.EstadioCreate):
-    db_estadio = get_estadio(db, estadio_id)
-    if not db_estadio:
-        return None
-    update_data = estadio.dict()
-    db.execute(models.estadio.update().where(models.estadio.c.estadio_id == estadio_id).values(**update_data))
-    db.commit()
-    return {**update_data, "estadio_id": estadio_id}
+    _mark_resumen_where(db, models.estadio.c.estadio_id == estadio_id)
+    db_estadio = _update_returning(
+        db, models.estadio, models.estadio.c.estadio_id == estadio_id,
+        estadio.dict(), {"estadio_id": estadio_id}
+    )
+    cache.invalidate("estadio", estadio_id)
+    return db_estadio
 
 def delete_estadio(db: Session, estadio_id: int):
-    db_estadio = get_estadio(db, estadio_id)
-    if not db_estadio:
-        return False
-    db.execute(models.estadio.delete().where(models.estadio.c.estadio_id == estadio_id))
-    db.commit()
-    return True
+    deleted = _delete_returning(
+        db, models.estadio, models.estadio.c.estadio_id == estadio_id, {"estadio_id": estadio_id}
+    )
+    cache.invalidate("estadio", estadio_id)
+    return deleted
 
 # Equipos
+@cache.cached("equipo")
 def get_equipo(db: Session, equipo_id: int):
     return db.query(models.equipo).filter(models.equipo.c.equipo_id == equipo_id).first()
 
-def get_equipos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.equipo).offset(skip).limit(limit).all()
+@cache.cached("equipo", "list")
+def get_equipos(db: Session, skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters):
+    query = _apply_filters(db.query(models.equipo), EQUIPO_FILTERS, filters)
+    query = _apply_sort(query, EQUIPO_SORT, sort, [models.equipo.c.equipo_id])
+    return query.offset(skip).limit(limit).all()
+
+@cache.cached("equipo", "list")
+def get_equipos_page(db: Session, cursor: Optional[str] = None, limit: int = 100, **filters):
+    query = _apply_filters(db.query(models.equipo), EQUIPO_FILTERS, filters)
+    return keyset_page(query, [models.equipo.c.equipo_id], cursor, limit)
+
+def get_equipos_by_ids(db: Session, equipo_ids: List[int]) -> dict:
+    return _rows_by_key(db, models.equipo, [models.equipo.c.equipo_id], equipo_ids)
 
 def create_equipo(db: Session, equipo: schemas.EquipoCreate):
     db_equipo = dict(equipo.dict())
     if isinstance(db_equipo["fecha_fundacion"], str):
         db_equipo["fecha_fundacion"] = date.fromisoformat(db_equipo["fecha_fundacion"])
     result = db.execute(models.equipo.insert().values(**db_equipo))
-    db.commit()
     db_equipo['equipo_id'] = result.inserted_primary_key[0]
+    _log_change(db, models.equipo, "insert", {"equipo_id": db_equipo['equipo_id']}, db_equipo)
+    db.commit()
+    cache.invalidate("equipo", db_equipo['equipo_id'])
     return db_equipo
 
+def create_equipos_bulk(db: Session, equipos: List[schemas.EquipoCreate], upsert: bool = False):
+    rows = [equipo.dict() for equipo in equipos]
+    for row in rows:
+        if isinstance(row["fecha_fundacion"], str):
+            row["fecha_fundacion"] = date.fromisoformat(row["fecha_fundacion"])
+    mark = _mark_resumen_by_nombre(models.equipo) if upsert else None
+    return _bulk_write(db, models.equipo, rows, [models.equipo.c.nombre], upsert, mark=mark)
+
 def update_equipo(db: Session, equipo_id: int, equipo: schemas.EquipoCreate):
-    db_equipo = get_equipo(db, equipo_id)
-    if not db_equipo:
-        return None
     update_data = equipo.dict()
     if isinstance(update_data["fecha_fundacion"], str):
         update_data["fecha_fundacion"] = date.fromisoformat(update_data["fecha_fundacion"])
-    db.execute(models.equipo.update().where(models.equipo.c.equipo_id == equipo_id).values(**update_data))
-    db.commit()
-    return {**update_data, "equipo_id": equipo_id}
+    _mark_resumen_where(db, models.equipo.c.equipo_id == equipo_id)
+    db_equipo = _update_returning(
+        db, models.equipo, models.equipo.c.equipo_id == equipo_id,
+        update_data, {"equipo_id": equipo_id}
+    )
+    cache.invalidate("equipo", equipo_id)
+    return db_equipo
 
 def delete_equipo(db: Session, equipo_id: int):
-    db_equipo = get_equipo(db, equipo_id)
-    if not db_equipo:
-        return False
-    db.execute(models.equipo.delete().where(models.equipo.c.equipo_id == equipo_id))
-    db.commit()
-    return True
+    _mark_resumen_where(db, models.equipo.c.equipo_id == equipo_id)
+    _log_cascade(db, models.equipo_temporada.c.equipo_id == equipo_id)
+    deleted = _delete_returning(
+        db, models.equipo, models.equipo.c.equipo_id == equipo_id, {"equipo_id": equipo_id}
+    )
+    cache.invalidate("equipo", equipo_id)
+    return deleted
+
+# Equipos con su estadio (expand=estadio) en una sola consulta con JOIN
+EQUIPO_EXPAND = {"estadio"}
+
+def _equipos_query(db: Session, expand: Set[str]):
+    columns = _labeled(models.equipo)
+    if "estadio" in expand:
+        columns += _labeled(models.estadio)
+    query = db.query(*columns).select_from(models.equipo)
+    if "estadio" in expand:
+        query = query.join(models.estadio, models.equipo.c.estadio_id == models.estadio.c.estadio_id)
+    return query
+
+def _nest_equipo(row, expand: Set[str]):
+    equipo = _unlabel(row, models.equipo)
+    if "estadio" in expand:
+        equipo["estadio"] = _unlabel(row, models.estadio)
+    return equipo
+
+def get_equipo_expanded(db: Session, equipo_id: int, expand: Set[str]):
+    row = _equipos_query(db, expand).filter(models.equipo.c.equipo_id == equipo_id).first()
+    return _nest_equipo(row, expand) if row else None
+
+def get_equipos_expanded(
+    db: Session, expand: Set[str], skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters
+):
+    query = _apply_filters(_equipos_query(db, expand), EQUIPO_FILTERS, filters)
+    rows = _apply_sort(query, EQUIPO_SORT, sort, [models.equipo.c.equipo_id]).offset(skip).limit(limit).all()
+    return [_nest_equipo(row, expand) for row in rows]
+
+def get_equipos_expanded_page(db: Session, expand: Set[str], cursor: Optional[str] = None, limit: int = 100, **filters):
+    page = keyset_page(
+        _apply_filters(_equipos_query(db, expand), EQUIPO_FILTERS, filters), [models.equipo.c.equipo_id], cursor, limit,
+        key_names=["equipo__equipo_id"]
+    )
+    page["items"] = [_nest_equipo(row, expand) for row in page["items"]]
+    return page
 
 # Temporadas
+@cache.cached("temporada")
 def get_temporada(db: Session, temporada_id: int):
     return db.query(models.temporada).filter(models.temporada.c.temporada_id == temporada_id).first()
 
-def get_temporadas(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.temporada).offset(skip).limit(limit).all()
+@cache.cached("temporada", "list")
+def get_temporadas(db: Session, skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters):
+    query = _apply_filters(db.query(models.temporada), TEMPORADA_FILTERS, filters)
+    query = _apply_sort(query, TEMPORADA_SORT, sort, [models.temporada.c.temporada_id])
+    return query.offset(skip).limit(limit).all()
+
+@cache.cached("temporada", "list")
+def get_temporadas_page(db: Session, cursor: Optional[str] = None, limit: int = 100, **filters):
+    query = _apply_filters(db.query(models.temporada), TEMPORADA_FILTERS, filters)
+    return keyset_page(query, [models.temporada.c.temporada_id], cursor, limit)
+
+def get_temporadas_by_ids(db: Session, temporada_ids: List[int]) -> dict:
+    return _rows_by_key(db, models.temporada, [models.temporada.c.temporada_id], temporada_ids)
 
 def create_temporada(db: Session, temporada: schemas.TemporadaCreate):
     db_temporada = dict(temporada.dict())
     result = db.execute(models.temporada.insert().values(**db_temporada))
-    db.commit()
     db_temporada['temporada_id'] = result.inserted_primary_key[0]
+    _log_change(db, models.temporada, "insert", {"temporada_id": db_temporada['temporada_id']}, db_temporada)
+    db.commit()
+    cache.invalidate("temporada", db_temporada['temporada_id'])
     return db_temporada
 
+def create_temporadas_bulk(db: Session, temporadas: List[schemas.TemporadaCreate]):
+    rows = [temporada.dict() for temporada in temporadas]
+    return _bulk_write(db, models.temporada, rows, [])
+
 def update_temporada(db: Session, temporada_id: int, temporada: schemas.TemporadaCreate):
-    db_temporada = get_temporada(db, temporada_id)
-    if not db_temporada:
-        return None
-    update_data = temporada.dict()
-    db.execute(models.temporada.update().where(models.temporada.c.temporada_id == temporada_id).values(**update_data))
-    db.commit()
-    return {**update_data, "temporada_id": temporada_id}
+    db_temporada = _update_returning(
+        db, models.temporada, models.temporada.c.temporada_id == temporada_id,
+        temporada.dict(), {"temporada_id": temporada_id}
+    )
+    cache.invalidate("temporada", temporada_id)
+    return db_temporada
 
 def delete_temporada(db: Session, temporada_id: int):
-    db_temporada = get_temporada(db, temporada_id)
-    if not db_temporada:
-        return False
-    db.execute(models.temporada.delete().where(models.temporada.c.temporada_id == temporada_id))
-    db.commit()
-    return True
+    _log_cascade(db, models.equipo_temporada.c.temporada_id == temporada_id)
+    deleted = _delete_returning(
+        db, models.temporada, models.temporada.c.temporada_id == temporada_id, {"temporada_id": temporada_id}
+    )
+    cache.invalidate("temporada", temporada_id)
+    return deleted
 
 # Equipo-Temporada
 def get_equipo_temporada(db: Session, equipo_id: int, temporada_id: int):
@@ -106,34 +439,421 @@ def get_equipo_temporada(db: Session, equipo_id: int, temporada_id: int):
         models.equipo_temporada.c.temporada_id == temporada_id
     ).first()
 
-def get_equipo_temporada_list(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.equipo_temporada).offset(skip).limit(limit).all()
+def get_equipo_temporada_list(db: Session, skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters):
+    query = _apply_filters(db.query(models.equipo_temporada), EQUIPO_TEMPORADA_FILTERS, filters)
+    return _apply_sort(query, EQUIPO_TEMPORADA_SORT, sort, [
+        models.equipo_temporada.c.equipo_id,
+        models.equipo_temporada.c.temporada_id
+    ]).offset(skip).limit(limit).all()
+
+def get_equipo_temporada_page(db: Session, cursor: Optional[str] = None, limit: int = 100, **filters):
+    return keyset_page(
+        _apply_filters(db.query(models.equipo_temporada), EQUIPO_TEMPORADA_FILTERS, filters),
+        [models.equipo_temporada.c.equipo_id, models.equipo_temporada.c.temporada_id],
+        cursor, limit
+    )
+
+def get_equipo_temporada_by_keys(db: Session, keys: List[tuple]) -> dict:
+    return _rows_by_key(
+        db, models.equipo_temporada,
+        [models.equipo_temporada.c.equipo_id, models.equipo_temporada.c.temporada_id], keys
+    )
 
 def create_equipo_temporada(db: Session, equipo_temporada: schemas.EquipoTemporadaCreate):
     db_equipo_temporada = dict(equipo_temporada.dict())
     db.execute(models.equipo_temporada.insert().values(**db_equipo_temporada))
+    _mark_resumen(db, [db_equipo_temporada["temporada_id"]])
+    _log_change(db, models.equipo_temporada, "insert", db_equipo_temporada, db_equipo_temporada)
     db.commit()
     return db_equipo_temporada
 
+def create_equipo_temporada_bulk(db: Session, equipo_temporada_list: List[schemas.EquipoTemporadaCreate], upsert: bool = False):
+    rows = [equipo_temporada.dict() for equipo_temporada in equipo_temporada_list]
+    key_columns = [models.equipo_temporada.c.equipo_id, models.equipo_temporada.c.temporada_id]
+    return _bulk_write(
+        db, models.equipo_temporada, rows, key_columns, upsert,
+        mark=lambda db, chunk: _mark_resumen(db, {row["temporada_id"] for row in chunk})
+    )
+
 def update_equipo_temporada(db: Session, equipo_id: int, temporada_id: int, equipo_temporada: schemas.EquipoTemporadaCreate):
-    db_equipo_temporada = get_equipo_temporada(db, equipo_id, temporada_id)
-    if not db_equipo_temporada:
-        return None
-    update_data = equipo_temporada.dict()
-    db.execute(models.equipo_temporada.update().where(
+    # La clave compuesta se cambia con un único UPDATE, sin leer antes la fila
+    _mark_resumen(db, [temporada_id, equipo_temporada.temporada_id])
+    return _update_returning(
+        db, models.equipo_temporada,
         (models.equipo_temporada.c.equipo_id == equipo_id) &
-        (models.equipo_temporada.c.temporada_id == temporada_id)
-    ).values(**update_data))
-    db.commit()
-    return update_data
+        (models.equipo_temporada.c.temporada_id == temporada_id),
+        equipo_temporada.dict(), {"equipo_id": equipo_id, "temporada_id": temporada_id}
+    )
 
 def delete_equipo_temporada(db: Session, equipo_id: int, temporada_id: int):
-    db_equipo_temporada = get_equipo_temporada(db, equipo_id, temporada_id)
-    if not db_equipo_temporada:
-        return False
-    db.execute(models.equipo_temporada.delete().where(
+    _mark_resumen(db, [temporada_id])
+    return _delete_returning(
+        db, models.equipo_temporada,
         (models.equipo_temporada.c.equipo_id == equipo_id) &
-        (models.equipo_temporada.c.temporada_id == temporada_id)
-    ))
+        (models.equipo_temporada.c.temporada_id == temporada_id),
+        {"equipo_id": equipo_id, "temporada_id": temporada_id}
+    )
+
+def _insert_new_equipo_temporada(db: Session, rows: List[dict]) -> set:
+    key_columns = [models.equipo_temporada.c.equipo_id, models.equipo_temporada.c.temporada_id]
+    stmt = _dialect_insert(db, models.equipo_temporada).on_conflict_do_nothing(index_elements=key_columns)
+    return {tuple(r) for r in db.execute(stmt.returning(*key_columns), rows)}
+
+def _write_equipo_temporada_segment(db: Session, ops: List[tuple], segment: dict, results: list):
+    et = models.equipo_temporada
+    key = tuple_(et.c.equipo_id, et.c.temporada_id)
+    deletes = [k for k, i in segment.items() if ops[i][0] == "delete"]
+    creates = [k for k, i in segment.items() if ops[i][0] == "create"]
+    if deletes:
+        stmt = et.delete().where(key.in_(deletes))
+        if db.get_bind().dialect.delete_returning:
+            deleted = {tuple(r) for r in db.execute(stmt.returning(et.c.equipo_id, et.c.temporada_id))}
+        else:
+            deleted = {tuple(r) for r in db.execute(select(et.c.equipo_id, et.c.temporada_id).where(key.in_(deletes)))}
+            db.execute(stmt)
+        for k in deletes:
+            results[segment[k]] = {"status": "deleted" if k in deleted else "not_found"}
+    if not creates:
+        return
+    rows = [{"equipo_id": e, "temporada_id": t} for e, t in creates]
+    errors = {}
+    try:
+        with db.begin_nested():
+            created = _insert_new_equipo_temporada(db, rows)
+    except IntegrityError:
+        # Alguna fila viola una clave foránea: se repite fila a fila para aislarla
+        created = set()
+        for k, row in zip(creates, rows):
+            try:
+                with db.begin_nested():
+                    created |= _insert_new_equipo_temporada(db, [row])
+            except IntegrityError as e:
+                errors[k] = str(e.orig).splitlines()[0] if e.orig else str(e)
+    for k in creates:
+        if k in created:
+            results[segment[k]] = {"status": "created"}
+        elif k in errors:
+            results[segment[k]] = {"status": "error", "detail": errors[k]}
+        else:
+            results[segment[k]] = {"status": "conflict", "detail": "La relación equipo-temporada ya existe"}
+
+def write_equipo_temporada_batch(db: Session, ops: List[tuple]) -> List[dict]:
+    """
+    Aplica en una sola transacción una lista de altas y bajas, cada una
+    ("create" | "delete", (equipo_id, temporada_id)), y devuelve el resultado
+    de cada operación en el mismo orden. Las operaciones se parten en tramos
+    sin claves repetidas, cada uno con una sentencia multi-fila por tipo, para
+    que un alta y una baja de la misma clave se apliquen en orden de llegada
+    """
+    results = [None] * len(ops)
+    segment = {}
+    for i, (op, key) in enumerate(ops):
+        if key in segment:
+            _write_equipo_temporada_segment(db, ops, segment, results)
+            segment = {}
+        segment[key] = i
+    _write_equipo_temporada_segment(db, ops, segment, results)
+    _mark_resumen(db, {key[1] for _, key in ops})
+    for (op, (equipo_id, temporada_id)), result in zip(ops, results):
+        key = {"equipo_id": equipo_id, "temporada_id": temporada_id}
+        if result["status"] == "created":
+            _log_change(db, models.equipo_temporada, "insert", key, key)
+        elif result["status"] == "deleted":
+            _log_change(db, models.equipo_temporada, "delete", key)
+    db.commit()
+    return results
+
+# Relaciones equipo-temporada con equipo, estadio y temporada anidados
+EQUIPO_TEMPORADA_EXPAND = {"equipo", "equipo.estadio", "temporada"}
+
+def _equipo_temporada_query(db: Session, expand: Set[str]):
+    et = models.equipo_temporada
+    equipo_expand = {"estadio"} if "equipo.estadio" in expand else set()
+    columns = _labeled(et)
+    if "equipo" in expand or equipo_expand:
+        columns += _labeled(models.equipo)
+    if equipo_expand:
+        columns += _labeled(models.estadio)
+    if "temporada" in expand:
+        columns += _labeled(models.temporada)
+    query = db.query(*columns).select_from(et)
+    if "equipo" in expand or equipo_expand:
+        query = query.join(models.equipo, et.c.equipo_id == models.equipo.c.equipo_id)
+    if equipo_expand:
+        query = query.join(models.estadio, models.equipo.c.estadio_id == models.estadio.c.estadio_id)
+    if "temporada" in expand:
+        query = query.join(models.temporada, et.c.temporada_id == models.temporada.c.temporada_id)
+    return query
+
+def _nest_equipo_temporada(row, expand: Set[str]):
+    equipo_temporada = _unlabel(row, models.equipo_temporada)
+    if "equipo" in expand or "equipo.estadio" in expand:
+        equipo_temporada["equipo"] = _nest_equipo(row, {"estadio"} if "equipo.estadio" in expand else set())
+    if "temporada" in expand:
+        equipo_temporada["temporada"] = _unlabel(row, models.temporada)
+    return equipo_temporada
+
+def get_equipo_temporada_expanded(db: Session, equipo_id: int, temporada_id: int, expand: Set[str]):
+    row = _equipo_temporada_query(db, expand).filter(
+        models.equipo_temporada.c.equipo_id == equipo_id,
+        models.equipo_temporada.c.temporada_id == temporada_id
+    ).first()
+    return _nest_equipo_temporada(row, expand) if row else None
+
+def get_equipo_temporada_list_expanded(
+    db: Session, expand: Set[str], skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters
+):
+    query = _apply_filters(_equipo_temporada_query(db, expand), EQUIPO_TEMPORADA_FILTERS, filters)
+    rows = _apply_sort(query, EQUIPO_TEMPORADA_SORT, sort, [
+        models.equipo_temporada.c.equipo_id,
+        models.equipo_temporada.c.temporada_id
+    ]).offset(skip).limit(limit).all()
+    return [_nest_equipo_temporada(row, expand) for row in rows]
+
+def get_equipo_temporada_expanded_page(
+    db: Session, expand: Set[str], cursor: Optional[str] = None, limit: int = 100, **filters
+):
+    page = keyset_page(
+        _apply_filters(_equipo_temporada_query(db, expand), EQUIPO_TEMPORADA_FILTERS, filters),
+        [models.equipo_temporada.c.equipo_id, models.equipo_temporada.c.temporada_id],
+        cursor, limit,
+        key_names=["equipo_temporada__equipo_id", "equipo_temporada__temporada_id"]
+    )
+    page["items"] = [_nest_equipo_temporada(row, expand) for row in page["items"]]
+    return page
+
+def get_equipos_by_temporada(db: Session, temporada_id: int, expand: Set[str], skip: int = 0, limit: int = 100):
+    rows = _equipos_query(db, expand).join(
+        models.equipo_temporada, models.equipo_temporada.c.equipo_id == models.equipo.c.equipo_id
+    ).filter(
+        models.equipo_temporada.c.temporada_id == temporada_id
+    ).order_by(models.equipo.c.equipo_id).offset(skip).limit(limit).all()
+    return [_nest_equipo(row, expand) for row in rows]
+
+# Estadísticas agregadas con GROUP BY. /stats/temporadas puede leerse de
+# temporada_resumen: las escrituras marcan en la sesión las temporadas
+# afectadas y se recalculan justo antes del commit, en la misma transacción
+EQUIPO_STATS_GROUPS = {
+    "estadio": models.equipo.c.estadio_id,
+    "ciudad": models.estadio.c.ciudad,
+    "pais": models.estadio.c.pais,
+}
+ESTADIO_STATS_GROUPS = {
+    "ciudad": models.estadio.c.ciudad,
+    "pais": models.estadio.c.pais,
+}
+_RESUMEN_PENDING = "temporada_resumen_pending"
+# Hasta que la reconstrucción del arranque termina, temporada_resumen puede
+# estar desfasada y /stats/temporadas agrega en vivo
+_resumen_stale = True
+
+def _temporada_aggregates():
+    t, et, e, s = models.temporada, models.equipo_temporada, models.equipo, models.estadio
+    return select(
+        t.c.temporada_id,
+        func.count(e.c.equipo_id).label("equipos"),
+        func.coalesce(func.sum(e.c.presupuesto), 0).label("presupuesto_total"),
+        func.coalesce(func.sum(s.c.capacidad), 0).label("capacidad_total"),
+    ).select_from(t).outerjoin(
+        et, et.c.temporada_id == t.c.temporada_id
+    ).outerjoin(
+        e, e.c.equipo_id == et.c.equipo_id
+    ).outerjoin(
+        s, s.c.estadio_id == e.c.estadio_id
+    ).group_by(t.c.temporada_id)
+
+def _mark_resumen(db: Session, temporada_ids):
+    if STATS_SUMMARY:
+        db.info.setdefault(_RESUMEN_PENDING, set()).update(temporada_ids)
+
+def _mark_resumen_where(db: Session, condition):
+    """
+    Marca las temporadas de los equipos (o estadios) que cumplen condition;
+    se consulta antes de escribir para incluir las filas que se borran
+    """
+    if STATS_SUMMARY:
+        et, e, s = models.equipo_temporada, models.equipo, models.estadio
+        query = select(et.c.temporada_id).join(
+            e, e.c.equipo_id == et.c.equipo_id
+        ).join(
+            s, s.c.estadio_id == e.c.estadio_id
+        ).where(condition).distinct()
+        _mark_resumen(db, db.scalars(query))
+
+def _mark_resumen_by_nombre(table):
+    """
+    mark de _bulk_write para los upserts de equipos o estadios por nombre: una
+    consulta por bloque mantiene el IN por debajo del límite de parámetros
+    """
+    return lambda db, chunk: _mark_resumen_where(db, table.c.nombre.in_([row["nombre"] for row in chunk]))
+
+def refresh_temporada_resumen(db: Session, temporada_ids=None):
+    """
+    Recalcula las filas de temporada_resumen indicadas (todas si es None)
+    con un INSERT ... SELECT ... ON CONFLICT DO UPDATE
+    """
+    resumen = models.temporada_resumen
+    query = _temporada_aggregates()
+    if temporada_ids is None:
+        query = query.where(true())
+    else:
+        temporada = models.temporada
+        temporada_ids = sorted(temporada_ids)
+        # Bloquea las temporadas, en orden, antes de agregar: otra transacción
+        # que recalcula la misma temporada espera a este commit, y su INSERT
+        # ... SELECT (sentencia aparte, nueva instantánea en READ COMMITTED) ya
+        # ve estas filas. NO KEY UPDATE no choca con el KEY SHARE que toman las
+        # claves foráneas de equipo_temporada
+        db.execute(
+            select(temporada.c.temporada_id).where(temporada.c.temporada_id.in_(temporada_ids))
+            .order_by(temporada.c.temporada_id).with_for_update(key_share=True)
+        )
+        query = query.where(temporada.c.temporada_id.in_(temporada_ids))
+    columns = ["temporada_id", "equipos", "presupuesto_total", "capacidad_total"]
+    stmt = _dialect_insert(db, resumen).from_select(columns, query)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[resumen.c.temporada_id],
+        set_={name: stmt.excluded[name] for name in columns[1:]}
+    )
+    db.execute(stmt)
+
+@event.listens_for(Session, "before_commit")
+def _refresh_pending_resumen(db: Session):
+    pending = db.info.pop(_RESUMEN_PENDING, None)
+    if pending:
+        refresh_temporada_resumen(db, pending)
+
+def rebuild_temporada_resumen(db: Session):
+    global _resumen_stale
+    refresh_temporada_resumen(db)
     db.commit()
-    return True 
\ No newline at end of file
+    _resumen_stale = False
+
+def get_temporada_stats(db: Session):
+    t = models.temporada
+    if STATS_SUMMARY and not _resumen_stale:
+        r = models.temporada_resumen
+        query = select(
+            t.c.temporada_id, t.c.nombre_temporada, t.c["año_inicio"],
+            func.coalesce(r.c.equipos, 0).label("equipos"),
+            func.coalesce(r.c.presupuesto_total, 0).label("presupuesto_total"),
+            func.coalesce(r.c.capacidad_total, 0).label("capacidad_total"),
+        ).select_from(t).outerjoin(r, r.c.temporada_id == t.c.temporada_id)
+    else:
+        aggregates = _temporada_aggregates().subquery()
+        query = select(
+            t.c.temporada_id, t.c.nombre_temporada, t.c["año_inicio"],
+            aggregates.c.equipos, aggregates.c.presupuesto_total, aggregates.c.capacidad_total,
+        ).select_from(t).join(aggregates, aggregates.c.temporada_id == t.c.temporada_id)
+    return db.execute(query.order_by(t.c["año_inicio"], t.c.temporada_id)).all()
+
+def get_equipo_stats(db: Session, group_by: str):
+    if group_by not in EQUIPO_STATS_GROUPS:
+        raise ValueError(f"Agrupación no válida: {group_by}")
+    grupo = EQUIPO_STATS_GROUPS[group_by]
+    query = select(
+        grupo.label("grupo"),
+        func.count().label("equipos"),
+        func.coalesce(func.sum(models.equipo.c.presupuesto), 0).label("presupuesto_total"),
+    ).select_from(models.equipo)
+    if group_by != "estadio":
+        query = query.join(models.estadio, models.estadio.c.estadio_id == models.equipo.c.estadio_id)
+    return db.execute(query.group_by(grupo).order_by(grupo)).all()
+
+def get_estadio_stats(db: Session, group_by: str):
+    if group_by not in ESTADIO_STATS_GROUPS:
+        raise ValueError(f"Agrupación no válida: {group_by}")
+    grupo = ESTADIO_STATS_GROUPS[group_by]
+    query = select(
+        grupo.label("grupo"),
+        func.count().label("estadios"),
+        func.coalesce(func.sum(models.estadio.c.capacidad), 0).label("capacidad_total"),
+    ).select_from(models.estadio)
+    return db.execute(query.group_by(grupo).order_by(grupo)).all()
+
+# Registro de cambios para la sincronización incremental (CHANGE_LOG)
+_CAMBIOS_PENDING = "cambios_pendientes"
+# Clave del advisory lock de PostgreSQL que serializa las escrituras en cambio
+_CAMBIO_LOCK_KEY = 2021
+
+def _jsonable(row) -> dict:
+    mapping = row._mapping if hasattr(row, "_mapping") else row
+    return {
+        key: float(value) if isinstance(value, Decimal) else value.isoformat() if isinstance(value, date) else value
+        for key, value in mapping.items()
+    }
+
+def _log_change(db: Session, table, operacion: str, clave: dict, datos=None):
+    """
+    Anota un cambio en la sesión; se inserta en cambio al hacer commit y se
+    descarta con el rollback
+    """
+    if CHANGE_LOG:
+        db.info.setdefault(_CAMBIOS_PENDING, []).append({
+            "tabla": table.name,
+            "operacion": operacion,
+            "clave": _jsonable(clave),
+            "datos": None if datos is None else _jsonable(datos),
+        })
+
+def _log_update(db: Session, table, key: dict, row):
+    """
+    Un cambio de clave primaria (equipo_temporada) se registra como baja de la
+    clave anterior y alta de la nueva
+    """
+    datos = _jsonable(row)
+    new_key = {column.key: datos[column.key] for column in table.primary_key.columns}
+    if new_key == _jsonable(key):
+        _log_change(db, table, "update", key, datos)
+    else:
+        _log_change(db, table, "delete", key)
+        _log_change(db, table, "insert", new_key, datos)
+
+def _log_bulk_changes(db: Session, table, results: List[dict]):
+    for result in results:
+        if result["status"] in ("created", "updated"):
+            data = result["data"]
+            key = {column.key: data[column.key] for column in table.primary_key.columns}
+            _log_change(db, table, "insert" if result["status"] == "created" else "update", key, data)
+
+def _log_cascade(db: Session, condition):
+    """
+    Registra las relaciones equipo-temporada que borrará el ON DELETE CASCADE
+    de un equipo o una temporada; se consulta antes de borrar
+    """
+    if CHANGE_LOG:
+        et = models.equipo_temporada
+        for equipo_id, temporada_id in db.execute(select(et.c.equipo_id, et.c.temporada_id).where(condition)):
+            _log_change(db, et, "delete", {"equipo_id": equipo_id, "temporada_id": temporada_id})
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_cambios(db: Session):
+    pending = db.info.pop(_CAMBIOS_PENDING, None)
+    if pending:
+        if db.get_bind().dialect.name == "postgresql":
+            # Con el lock tomado hasta el commit, los seq se confirman en orden:
+            # un lector nunca ve un seq sin haber visto antes los menores
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _CAMBIO_LOCK_KEY})
+        db.execute(models.cambio.insert(), pending)
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_cambios(db: Session, transaction):
+    # Tras un rollback o un close sin commit; los savepoints no cuentan
+    if transaction.parent is None:
+        db.info.pop(_CAMBIOS_PENDING, None)
+
+def get_changes(db: Session, since: int = 0, limit: int = 100) -> dict:
+    """
+    Cambios con seq mayor que since, en orden. next_since es el seq del último
+    devuelto (o since si no hay ninguno) y sirve como since de la siguiente
+    petición
+    """
+    rows = db.execute(
+        select(models.cambio).where(models.cambio.c.seq > since).order_by(models.cambio.c.seq).limit(limit + 1)
+    ).all()
+    items = rows[:limit]
+    return {
+        "items": items,
+        "next_since": items[-1].seq if items else since,
+        "has_more": len(rows) > limit,
+    }
@@ -0,0 +1,225 @@
+"""
+Async counterparts of the functions in crud.py.
+
+Each function accepts either an AsyncSession or a regular Session. With an
+AsyncSession the query from crud.py runs through run_sync on the async driver;
+with a Session it is executed in the threadpool. Either way the event loop is
+never blocked while the database answers.
+"""
+from typing import List, Optional, Set, Union
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, database, schemas
+
+EXPORT_BATCH_SIZE = 1000
+
+DBSession = Union[Session, AsyncSession]
+
+async def run(db: DBSession, func, *args, **kwargs):
+    """
+    Ejecuta una función de crud.py con la sesión indicada sin bloquear el event loop
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(func, *args, **kwargs)
+    return await run_in_threadpool(func, db, *args, **kwargs)
+
+async def stream_partitions(stmt, batch_size: int = EXPORT_BATCH_SIZE, replica: bool = False):
+    """
+    Genera lotes de filas desde un cursor del servidor (yield_per), con una
+    sesión propia que vive lo mismo que la respuesta en streaming. Con
+    replica=True lee de la réplica si responde
+    """
+    stmt = stmt.execution_options(yield_per=batch_size)
+    if database.DB_ASYNC:
+        db = await database.connect_async_replica() if replica else None
+        async with db or database.AsyncSessionLocal() as db:
+            result = await db.stream(stmt)
+            async for partition in result.mappings().partitions():
+                yield partition
+        return
+    db = await run_in_threadpool(database.connect_replica) if replica else None
+    db = db or database.SessionLocal()
+    try:
+        result = await run_in_threadpool(db.execute, stmt)
+        partitions = result.mappings().partitions()
+        while True:
+            partition = await run_in_threadpool(next, partitions, None)
+            if partition is None:
+                break
+            yield partition
+    finally:
+        await run_in_threadpool(db.close)
+
+# Estadios
+async def get_estadio(db: DBSession, estadio_id: int):
+    return await run(db, crud.get_estadio, estadio_id)
+
+async def get_estadios(db: DBSession, skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters):
+    return await run(db, crud.get_estadios, skip=skip, limit=limit, sort=sort, **filters)
+
+async def get_estadios_page(db: DBSession, cursor: Optional[str] = None, limit: int = 100, **filters):
+    return await run(db, crud.get_estadios_page, cursor=cursor, limit=limit, **filters)
+
+async def get_estadios_by_ids(db: DBSession, estadio_ids: List[int]):
+    return await run(db, crud.get_estadios_by_ids, estadio_ids)
+
+async def create_estadio(db: DBSession, estadio: schemas.EstadioCreate):
+    return await run(db, crud.create_estadio, estadio)
+
+async def create_estadios_bulk(db: DBSession, estadios: List[schemas.EstadioCreate], upsert: bool = False):
+    return await run(db, crud.create_estadios_bulk, estadios, upsert=upsert)
+
+async def update_estadio(db: DBSession, estadio_id: int, estadio: schemas.EstadioCreate):
+    return await run(db, crud.update_estadio, estadio_id, estadio)
+
+async def delete_estadio(db: DBSession, estadio_id: int):
+    return await run(db, crud.delete_estadio, estadio_id)
+
+# Equipos
+async def get_equipo(db: DBSession, equipo_id: int):
+    return await run(db, crud.get_equipo, equipo_id)
+
+async def get_equipos(db: DBSession, skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters):
+    return await run(db, crud.get_equipos, skip=skip, limit=limit, sort=sort, **filters)
+
+async def get_equipos_page(db: DBSession, cursor: Optional[str] = None, limit: int = 100, **filters):
+    return await run(db, crud.get_equipos_page, cursor=cursor, limit=limit, **filters)
+
+async def get_equipo_expanded(db: DBSession, equipo_id: int, expand: Set[str]):
+    return await run(db, crud.get_equipo_expanded, equipo_id, expand)
+
+async def get_equipos_expanded(
+    db: DBSession, expand: Set[str], skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters
+):
+    return await run(db, crud.get_equipos_expanded, expand, skip=skip, limit=limit, sort=sort, **filters)
+
+async def get_equipos_expanded_page(db: DBSession, expand: Set[str], cursor: Optional[str] = None, limit: int = 100, **filters):
+    return await run(db, crud.get_equipos_expanded_page, expand, cursor=cursor, limit=limit, **filters)
+
+async def get_equipos_by_ids(db: DBSession, equipo_ids: List[int]):
+    return await run(db, crud.get_equipos_by_ids, equipo_ids)
+
+async def create_equipo(db: DBSession, equipo: schemas.EquipoCreate):
+    return await run(db, crud.create_equipo, equipo)
+
+async def create_equipos_bulk(db: DBSession, equipos: List[schemas.EquipoCreate], upsert: bool = False):
+    return await run(db, crud.create_equipos_bulk, equipos, upsert=upsert)
+
+async def update_equipo(db: DBSession, equipo_id: int, equipo: schemas.EquipoCreate):
+    return await run(db, crud.update_equipo, equipo_id, equipo)
+
+async def delete_equipo(db: DBSession, equipo_id: int):
+    return await run(db, crud.delete_equipo, equipo_id)
+
+# Temporadas
+async def get_temporada(db: DBSession, temporada_id: int):
+    return await run(db, crud.get_temporada, temporada_id)
+
+async def get_temporadas(db: DBSession, skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters):
+    return await run(db, crud.get_temporadas, skip=skip, limit=limit, sort=sort, **filters)
+
+async def get_temporadas_page(db: DBSession, cursor: Optional[str] = None, limit: int = 100, **filters):
+    return await run(db, crud.get_temporadas_page, cursor=cursor, limit=limit, **filters)
+
+async def get_temporadas_by_ids(db: DBSession, temporada_ids: List[int]):
+    return await run(db, crud.get_temporadas_by_ids, temporada_ids)
+
+async def create_temporada(db: DBSession, temporada: schemas.TemporadaCreate):
+    return await run(db, crud.create_temporada, temporada)
+
+async def create_temporadas_bulk(db: DBSession, temporadas: List[schemas.TemporadaCreate]):
+    return await run(db, crud.create_temporadas_bulk, temporadas)
+
+async def update_temporada(db: DBSession, temporada_id: int, temporada: schemas.TemporadaCreate):
+    return await run(db, crud.update_temporada, temporada_id, temporada)
+
+async def delete_temporada(db: DBSession, temporada_id: int):
+    return await run(db, crud.delete_temporada, temporada_id)
+
+# Equipo-Temporada
+async def get_equipo_temporada(db: DBSession, equipo_id: int, temporada_id: int):
+    return await run(db, crud.get_equipo_temporada, equipo_id, temporada_id)
+
+async def get_equipo_temporada_list(db: DBSession, skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters):
+    return await run(db, crud.get_equipo_temporada_list, skip=skip, limit=limit, sort=sort, **filters)
+
+async def get_equipo_temporada_page(db: DBSession, cursor: Optional[str] = None, limit: int = 100, **filters):
+    return await run(db, crud.get_equipo_temporada_page, cursor=cursor, limit=limit, **filters)
+
+async def get_equipo_temporada_expanded(db: DBSession, equipo_id: int, temporada_id: int, expand: Set[str]):
+    return await run(db, crud.get_equipo_temporada_expanded, equipo_id, temporada_id, expand)
+
+async def get_equipo_temporada_list_expanded(
+    db: DBSession, expand: Set[str], skip: int = 0, limit: int = 100, sort: Optional[str] = None, **filters
+):
+    return await run(db, crud.get_equipo_temporada_list_expanded, expand, skip=skip, limit=limit, sort=sort, **filters)
+
+async def get_equipo_temporada_expanded_page(db: DBSession, expand: Set[str], cursor: Optional[str] = None, limit: int = 100, **filters):
+    return await run(db, crud.get_equipo_temporada_expanded_page, expand, cursor=cursor, limit=limit, **filters)
+
+async def get_equipos_by_temporada(db: DBSession, temporada_id: int, expand: Set[str], skip: int = 0, limit: int = 100):
+    return await run(db, crud.get_equipos_by_temporada, temporada_id, expand, skip=skip, limit=limit)
+
+async def get_equipo_temporada_by_keys(db: DBSession, keys: List[tuple]):
+    return await run(db, crud.get_equipo_temporada_by_keys, keys)
+
+async def create_equipo_temporada(db: DBSession, equipo_temporada: schemas.EquipoTemporadaCreate):
+    return await run(db, crud.create_equipo_temporada, equipo_temporada)
+
+async def create_equipo_temporada_bulk(db: DBSession, equipo_temporada_list: List[schemas.EquipoTemporadaCreate], upsert: bool = False):
+    return await run(db, crud.create_equipo_temporada_bulk, equipo_temporada_list, upsert=upsert)
+
+async def write_equipo_temporada_batch(db: DBSession, ops: List[tuple]):
+    return await run(db, crud.write_equipo_temporada_batch, ops)
+
+async def update_equipo_temporada(db: DBSession, equipo_id: int, temporada_id: int, equipo_temporada: schemas.EquipoTemporadaCreate):
+    return await run(db, crud.update_equipo_temporada, equipo_id, temporada_id, equipo_temporada)
+
+async def delete_equipo_temporada(db: DBSession, equipo_id: int, temporada_id: int):
+    return await run(db, crud.delete_equipo_temporada, equipo_id, temporada_id)
+
+# Estadísticas
+async def get_temporada_stats(db: DBSession):
+    return await run(db, crud.get_temporada_stats)
+
+async def get_equipo_stats(db: DBSession, group_by: str):
+    return await run(db, crud.get_equipo_stats, group_by)
+
+async def get_estadio_stats(db: DBSession, group_by: str):
+    return await run(db, crud.get_estadio_stats, group_by)
+
+# Registro de cambios
+async def get_changes(db: DBSession, since: int = 0, limit: int = 100):
+    return await run(db, crud.get_changes, since=since, limit=limit)
+
+async def poll_changes(since: int, limit: int = 100, replica: bool = False):
+    """
+    get_changes con una sesión propia que se cierra al terminar, para que un
+    stream abierto no retenga una conexión entre consultas. Con replica=True
+    lee de la réplica si responde
+    """
+    if database.DB_ASYNC:
+        db = await database.connect_async_replica() if replica else None
+        async with db or database.AsyncSessionLocal() as db:
+            return await db.run_sync(crud.get_changes, since=since, limit=limit)
+    db = await run_in_threadpool(database.connect_replica) if replica else None
+    db = db or database.SessionLocal()
+    try:
+        return await run_in_threadpool(crud.get_changes, db, since=since, limit=limit)
+    finally:
+        await run_in_threadpool(db.close)
+
+async def rebuild_temporada_resumen():
+    """
+    Recalcula temporada_resumen completa con una sesión propia (arranque)
+    """
+    if database.DB_ASYNC:
+        async with database.AsyncSessionLocal() as db:
+            await db.run_sync(crud.rebuild_temporada_resumen)
+        return
+    db = database.SessionLocal()
+    try:
+        await run_in_threadpool(crud.rebuild_temporada_resumen, db)
+    finally:
+        await run_in_threadpool(db.close)
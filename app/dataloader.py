@@ -0,0 +1,64 @@
+"""
+Request-scoped batching of lookups by key.
+
+A DataLoader collects the keys requested with load() during one turn of the
+event loop and resolves them with a single call to its batch function, so
+repeated or concurrent lookups within a request share one
+`WHERE key IN (...)` query. Each key is fetched at most once per loader.
+Dependencies: none.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+
+class DataLoader:
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, object]]],
+        max_batch_size: Optional[int] = None,
+    ):
+        """
+        batch_fn recibe una lista de claves sin repetir y devuelve un dict
+        clave -> valor; las claves ausentes se resuelven como None
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+        # El event loop solo guarda referencias débiles a sus tareas
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> "asyncio.Future":
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                # Se despacha cuando el resto de load() de este turno ya se han encolado
+                loop.call_soon(self._schedule_dispatch)
+        return future
+
+    def _schedule_dispatch(self):
+        task = asyncio.get_running_loop().create_task(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def load_many(self, keys: List[Hashable]) -> list:
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    async def _dispatch(self):
+        queue, self._queue = self._queue, []
+        size = self.max_batch_size or len(queue)
+        for start in range(0, len(queue), size):
+            keys = queue[start:start + size]
+            try:
+                found = await self.batch_fn(keys)
+            except Exception as e:
+                for key in keys:
+                    # Un fallo no se cachea: otra llamada a load() lo reintenta
+                    self._futures.pop(key).set_exception(e)
+                continue
+            for key in keys:
+                self._futures[key].set_result(found.get(key))
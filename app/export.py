@@ -0,0 +1,62 @@
+"""
+Streaming NDJSON/CSV export of whole tables.
+
+Rows come from a server-side cursor in batches and are encoded batch by
+batch, so memory use does not depend on the size of the table.
+"""
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from fastapi.responses import StreamingResponse
+
+from . import crud, crud_async
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+async def _ndjson(stmt, replica):
+    async for partition in crud_async.stream_partitions(stmt, replica=replica):
+        yield "".join(
+            json.dumps(dict(row), default=_json_default, ensure_ascii=False) + "\n"
+            for row in partition
+        )
+
+
+async def _csv(stmt, columns, replica):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for partition in crud_async.stream_partitions(stmt, replica=replica):
+        writer.writerows([row[column] for column in columns] for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(table, format: str, replica: bool = False) -> StreamingResponse:
+    stmt = crud.export_select(table)
+    if format == "csv":
+        body = _csv(stmt, [column.key for column in table.c], replica)
+    else:
+        body = _ndjson(stmt, replica)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{table.name}.{format}"'}
+    )
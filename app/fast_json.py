@@ -0,0 +1,63 @@
+"""
+Fast serialization path for list responses.
+
+List routes normally hand database rows to FastAPI, which validates every
+row through the response_model before encoding it. Those rows come straight
+from our own tables, so with FAST_JSON enabled they are encoded directly to
+bytes with orjson, in the field order of the schema.
+Dependencies: orjson.
+"""
+import os
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import Response
+
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+_field_names = {}
+
+
+def _default(value):
+    # Numeric (presupuesto) llega como Decimal; el esquema lo expone como float
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def _names(schema):
+    if schema not in _field_names:
+        fields = getattr(schema, "model_fields", None) or schema.__fields__
+        _field_names[schema] = list(fields)
+    return _field_names[schema]
+
+
+def _items(items, schema):
+    names = _names(schema)
+    return [
+        item if item is None or isinstance(item, dict) else {name: item._mapping[name] for name in names}
+        for item in items
+    ]
+
+
+def encode(content, schema) -> bytes:
+    """
+    Codifica una lista de filas, o un dict con las filas en items (página o
+    batch-get), como JSON
+    """
+    if isinstance(content, dict):
+        content = {**content, "items": _items(content["items"], schema)}
+    else:
+        content = _items(content, schema)
+    # Los nombres de columna son quoted_name (subclase de str)
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def list_response(content, schema):
+    """
+    Devuelve la respuesta ya codificada si FAST_JSON está activo; si no, el
+    contenido tal cual para que FastAPI lo valide con el response_model
+    """
+    if not FAST_JSON:
+        return content
+    return Response(encode(content, schema), media_type="application/json")
@@ -0,0 +1,126 @@
+"""
+Group commit for equipo_temporada creates and deletes.
+
+With ET_GROUP_COMMIT enabled, POST and DELETE on /equipo_temporada hand
+their key to a background writer instead of running their own statement
+and commit. The writer collects the operations that arrive within
+GROUP_COMMIT_WINDOW_MS of the oldest pending one (up to
+GROUP_COMMIT_MAX_BATCH), applies them in one transaction with multi-row
+statements and resolves each caller with its own result, so a burst of
+registrations pays for one commit instead of one per row. Each worker
+process has its own writer.
+Dependencies: SQLAlchemy.
+"""
+import asyncio
+import logging
+import os
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from . import crud_async, database
+from .metrics import observe_group_commit
+from .resilience import execute_once
+
+logger = logging.getLogger(__name__)
+
+ET_GROUP_COMMIT = os.getenv("ET_GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "5"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "500"))
+
+
+class GroupCommitWriter:
+    def __init__(self, window_ms: float = GROUP_COMMIT_WINDOW_MS, max_batch: int = GROUP_COMMIT_MAX_BATCH):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        # (operación, clave, futuro, instante de llegada)
+        self._pending: List[tuple] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._closing = False
+
+    async def create(self, equipo_id: int, temporada_id: int) -> dict:
+        """
+        Devuelve {"status": "created"}, o "conflict"/"error" con detail
+        """
+        return await self._submit("create", (equipo_id, temporada_id))
+
+    async def delete(self, equipo_id: int, temporada_id: int) -> dict:
+        """
+        Devuelve {"status": "deleted"} o {"status": "not_found"}
+        """
+        return await self._submit("delete", (equipo_id, temporada_id))
+
+    def _submit(self, op: str, key: tuple) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._pending.append((op, key, future, loop.time()))
+        self._wakeup.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return future
+
+    async def close(self):
+        """
+        Escribe lo pendiente y detiene el escritor (apagado de la aplicación)
+        """
+        if self._task is None or self._task.done():
+            return
+        self._closing = True
+        self._wakeup.set()
+        self._full.set()
+        await self._task
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # La ventana se cuenta desde la operación más antigua: lo que llegó
+            # mientras se escribía el lote anterior sale sin esperar
+            remaining = self._pending[0][3] + self.window - loop.time()
+            if remaining > 0 and len(self._pending) < self.max_batch and not self._closing:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            await self._write(batch)
+
+    async def _write(self, batch: List[tuple]):
+        ops = [(op, key) for op, key, _, _ in batch]
+        observe_group_commit(len(ops))
+        try:
+            if database.DB_ASYNC:
+                async with database.AsyncSessionLocal() as db:
+                    results = await execute_once(crud_async.write_equipo_temporada_batch, db, ops)
+            else:
+                db = database.SessionLocal()
+                try:
+                    results = await execute_once(crud_async.write_equipo_temporada_batch, db, ops)
+                finally:
+                    await run_in_threadpool(db.close)
+        except Exception as e:
+            logger.error(f"Error al escribir un lote de {len(ops)} operaciones equipo-temporada: {str(e)}")
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future, _), result in zip(batch, results):
+            # El cliente pudo desconectarse mientras esperaba
+            if not future.done():
+                future.set_result(result)
+
+
+writer = GroupCommitWriter()
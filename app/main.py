@@ -1,23 +1,64 @@
-from fastapi import FastAPI, HTTPException, APIRouter, Depends, Request
+from fastapi import FastAPI, HTTPException, APIRouter, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
+from typing import List, Literal, Optional, Union
+from datetime import date
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
-from . import models, schemas, crud
-from .database import get_db, execute_with_retry
+from . import models, schemas, crud, crud_async, metrics
+from .cache import cache
+from .export import export_response
+from .fast_json import encode, list_response
+from .dataloader import DataLoader
+from .crud_async import DBSession
+from . import database, group_commit
+from .database import get_session, get_read_session, log_pool_config
+from .resilience import CircuitOpenError, DeadlineExceededError, execute_once, execute_with_retry
+import asyncio
+import os
 import time
+import hashlib
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential
+import math
+from contextlib import asynccontextmanager
+from http.cookies import SimpleCookie
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Cache-Control enviado en las respuestas GET con ETag
+HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "private, no-cache")
+# Máximo de cambios por página de /changes y por evento de /changes/stream
+CHANGES_MAX_LIMIT = int(os.getenv("CHANGES_MAX_LIMIT", "1000"))
+# Segundos entre consultas de /changes/stream y sin eventos antes de un keepalive
+CHANGE_STREAM_POLL_INTERVAL = float(os.getenv("CHANGE_STREAM_POLL_INTERVAL", "1"))
+CHANGE_STREAM_KEEPALIVE = float(os.getenv("CHANGE_STREAM_KEEPALIVE", "15"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Configurar logging al arrancar el servidor, no al importar la aplicación
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    log_pool_config()
+    if database.DB_POOL_WARMUP:
+        await database.warm_up()
+    if crud.STATS_SUMMARY:
+        start = time.perf_counter()
+        try:
+            await crud_async.rebuild_temporada_resumen()
+        except (SQLAlchemyError, *database.CONNECT_ERRORS) as e:
+            # Como en warm_up: sin base de datos el arranque sigue y
+            # /stats/temporadas agrega en vivo mientras el resumen esté desfasado
+            logger.warning(f"No se pudo recalcular temporada_resumen: {str(e) or type(e).__name__}")
+        else:
+            logger.info(f"temporada_resumen recalculada en {time.perf_counter() - start:.2f}s")
+    yield
+    await group_commit.writer.close()
+    await database.dispose_engines()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -28,102 +69,375 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Middleware para manejar errores de base de datos
+# Middleware para manejar errores de base de datos y registrar métricas
 @app.middleware("http")
 async def db_session_middleware(request: Request, call_next):
-    start_time = time.time()
+    start_time = time.perf_counter()
+    stats = metrics.start_request()
     try:
         response = await call_next(request)
-        process_time = time.time() - start_time
-        logger.info(f"Request completed in {process_time:.2f} seconds")
-        return response
     except OperationalError as e:
         logger.error(f"Error de conexión a la base de datos: {str(e)}")
-        return JSONResponse(
+        response = JSONResponse(
             status_code=503,
             content={"detail": "Error de conexión a la base de datos. Por favor, intente nuevamente."}
         )
     except SQLAlchemyError as e:
         logger.error(f"Error de SQLAlchemy: {str(e)}")
-        return JSONResponse(
+        response = JSONResponse(
             status_code=503,
             content={"detail": "Error en la operación de base de datos. Por favor, intente nuevamente."}
         )
     except Exception as e:
         logger.error(f"Error interno del servidor: {str(e)}")
-        return JSONResponse(
+        response = JSONResponse(
             status_code=500,
             content={"detail": "Error interno del servidor"}
         )
+    metrics.observe_request(request, response.status_code, time.perf_counter() - start_time, stats)
+    return response
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Base de datos no disponible. Por favor, intente nuevamente."},
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "La base de datos no respondió a tiempo. Por favor, intente nuevamente."}
+    )
+
+# Middleware de peticiones condicionales: ETag débil calculado sobre el cuerpo
+# JSON de las respuestas GET y 304 Not Modified si coincide con If-None-Match.
+# ASGI puro: solo retiene el cuerpo de las respuestas a las que pone ETag, el
+# resto (streaming, exportaciones) pasa mensaje a mensaje
+class ETagMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        start = None
+        chunks = []
+
+        async def send_with_etag(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if message["status"] == 200 and headers.get("content-type") == "application/json":
+                    start = message
+                    return
+            elif start is not None and message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                body = b"".join(chunks)
+                etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+                headers = MutableHeaders(raw=start["headers"])
+                headers["etag"] = etag
+                headers["cache-control"] = HTTP_CACHE_CONTROL
+                if_none_match = Headers(scope=scope).get("if-none-match")
+                if if_none_match:
+                    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+                    if "*" in tags or etag.removeprefix("W/") in tags:
+                        del headers["content-length"]
+                        del headers["content-type"]
+                        await send({**start, "status": 304})
+                        await send({"type": "http.response.body", "body": b""})
+                        return
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+app.add_middleware(ETagMiddleware)
+
+# Read-your-writes: tras una escritura correcta el cliente lee del primario
+# durante REPLICA_MAX_LAG segundos. ASGI puro: solo añade la cookie al
+# mensaje de inicio de la respuesta
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not database.REPLICA_DATABASE_URL
+            or scope["method"] not in ("POST", "PUT", "PATCH", "DELETE")
+            or scope["path"].endswith("/batch-get")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[database.RECENT_WRITE_COOKIE] = "1"
+                cookie[database.RECENT_WRITE_COOKIE].update({
+                    "max-age": math.ceil(database.REPLICA_MAX_LAG), "path": "/",
+                    "httponly": True, "samesite": "lax",
+                })
+                MutableHeaders(raw=message["headers"]).append(
+                    "set-cookie", cookie.output(header="").strip()
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+app.add_middleware(ReadYourWritesMiddleware)
 
 # Routers
 estadios_router = APIRouter(prefix="/estadios", tags=["Estadios"])
 equipos_router = APIRouter(prefix="/equipos", tags=["Equipos"])
 temporadas_router = APIRouter(prefix="/temporadas", tags=["Temporadas"])
 equipo_temporada_router = APIRouter(prefix="/equipo_temporada", tags=["Equipo-Temporada"])
+stats_router = APIRouter(prefix="/stats", tags=["Estadisticas"])
+changes_router = APIRouter(prefix="/changes", tags=["Cambios"])
+
+def parse_expand(expand: Optional[str], allowed: set) -> set:
+    """
+    Convierte el parámetro expand (lista separada por comas) en un conjunto,
+    rechazando con 400 los valores no soportados
+    """
+    if not expand:
+        return set()
+    fields = {field.strip() for field in expand.split(",") if field.strip()}
+    unknown = fields - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Valores de expand no válidos: {', '.join(sorted(unknown))}. Permitidos: {', '.join(sorted(allowed))}"
+        )
+    return fields
+
+# Filtros de los listados: se pasan a crud, que los traduce a SQL
+def estadio_filters(
+    ciudad: Optional[str] = None, pais: Optional[str] = None,
+    capacidad_min: Optional[int] = None, capacidad_max: Optional[int] = None
+) -> dict:
+    return {"ciudad": ciudad, "pais": pais, "capacidad_min": capacidad_min, "capacidad_max": capacidad_max}
+
+def equipo_filters(
+    estadio_id: Optional[int] = None,
+    presupuesto_min: Optional[float] = None, presupuesto_max: Optional[float] = None,
+    fecha_fundacion_min: Optional[date] = None, fecha_fundacion_max: Optional[date] = None
+) -> dict:
+    return {
+        "estadio_id": estadio_id,
+        "presupuesto_min": presupuesto_min, "presupuesto_max": presupuesto_max,
+        "fecha_fundacion_min": fecha_fundacion_min, "fecha_fundacion_max": fecha_fundacion_max,
+    }
+
+def temporada_filters(
+    año_inicio: Optional[int] = None, año_inicio_min: Optional[int] = None, año_inicio_max: Optional[int] = None
+) -> dict:
+    return {"año_inicio": año_inicio, "año_inicio_min": año_inicio_min, "año_inicio_max": año_inicio_max}
+
+def equipo_temporada_filters(equipo_id: Optional[int] = None, temporada_id: Optional[int] = None) -> dict:
+    return {"equipo_id": equipo_id, "temporada_id": temporada_id}
+
+def check_sort(cursor: Optional[str], sort: Optional[str]):
+    if cursor is not None and sort:
+        raise HTTPException(status_code=400, detail="sort no se puede combinar con cursor: las páginas se ordenan por clave primaria")
+
+# Batch-get: los listados aceptan ?ids=1,2,3 (equipo_id:temporada_id en
+# equipo_temporada) y cada recurso expone POST /batch-get con las claves en el
+# cuerpo. Todas se leen en una sola consulta IN; la respuesta mantiene el orden
+# pedido, con null en items y la clave en missing para las que no existen
+def parse_ids(ids: str) -> List[int]:
+    try:
+        return [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids debe ser una lista de enteros separados por comas")
+
+def parse_keys(ids: str) -> List[tuple]:
+    try:
+        keys = [tuple(int(part) for part in value.split(":")) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        keys = None
+    if keys is None or any(len(key) != 2 for key in keys):
+        raise HTTPException(status_code=400, detail="ids debe ser una lista de pares equipo_id:temporada_id separados por comas")
+    return keys
+
+def check_ids(cursor: Optional[str], expand: Optional[str], sort: Optional[str], filters: dict):
+    if cursor is not None or expand or sort or any(value is not None for value in filters.values()):
+        raise HTTPException(status_code=400, detail="ids no se puede combinar con cursor, expand, sort ni filtros")
+
+async def batch_get(db: DBSession, func, keys: list, key_names: Optional[tuple] = None) -> dict:
+    if len(keys) > crud.BATCH_GET_MAX:
+        raise HTTPException(status_code=400, detail=f"Se admiten como máximo {crud.BATCH_GET_MAX} claves por petición")
+    loader = DataLoader(lambda batch: execute_with_retry(func, db, batch))
+    rows = await loader.load_many(keys)
+    missing = list(dict.fromkeys(key for key, row in zip(keys, rows) if row is None))
+    if key_names:
+        missing = [dict(zip(key_names, key)) for key in missing]
+    return {"items": rows, "missing": missing}
+
+# Los listados aceptan `cursor` (vacío para la primera página) para paginar por
+# clave primaria; la respuesta incluye entonces `next_cursor`. Sin `cursor` se
+# mantiene la paginación con skip/limit y se puede ordenar con `sort`
+# ("-columna" para orden descendente).
 
 # Estadios
 @estadios_router.post("/", response_model=schemas.Estadio)
-async def create_estadio(estadio: schemas.EstadioCreate, db: Session = Depends(get_db)):
+async def create_estadio(estadio: schemas.EstadioCreate, db: DBSession = Depends(get_session)):
     try:
-        return crud.create_estadio(db=db, estadio=estadio)
+        return await execute_once(crud_async.create_estadio, db, estadio=estadio)
     except SQLAlchemyError as e:
         raise HTTPException(status_code=503, detail="Error al crear el estadio")
 
-@estadios_router.get("/", response_model=List[schemas.Estadio])
-async def read_estadios(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@estadios_router.post("/bulk", response_model=List[schemas.EstadioBulkResult])
+async def create_estadios_bulk(estadios: List[schemas.EstadioCreate], upsert: bool = False, db: DBSession = Depends(get_session)):
     try:
+        return await execute_once(crud_async.create_estadios_bulk, db, estadios, upsert=upsert)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al crear estadios en bloque: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al crear los estadios")
+
+@estadios_router.get("/", response_model=Union[schemas.EstadioBatch, List[schemas.Estadio], schemas.EstadioPage])
+async def read_estadios(
+    skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), cursor: Optional[str] = None, sort: Optional[str] = None,
+    ids: Optional[str] = None, filters: dict = Depends(estadio_filters), db: DBSession = Depends(get_read_session)
+):
+    check_sort(cursor, sort)
+    try:
+        if ids is not None:
+            check_ids(cursor, None, sort, filters)
+            result = await batch_get(db, crud_async.get_estadios_by_ids, parse_ids(ids))
+            return list_response(result, schemas.Estadio)
+        if cursor is not None:
+            logger.info(f"Obteniendo estadios (cursor={cursor!r}, limit={limit})")
+            page = await execute_with_retry(crud_async.get_estadios_page, db, cursor=cursor, limit=limit, **filters)
+            return list_response(page, schemas.Estadio)
         logger.info(f"Obteniendo estadios (skip={skip}, limit={limit})")
-        estadios = execute_with_retry(crud.get_estadios, db, skip=skip, limit=limit)
+        estadios = await execute_with_retry(crud_async.get_estadios, db, skip=skip, limit=limit, sort=sort, **filters)
         logger.info(f"Se obtuvieron {len(estadios)} estadios")
-        return estadios
+        return list_response(estadios, schemas.Estadio)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except SQLAlchemyError as e:
         logger.error(f"Error al obtener estadios: {str(e)}")
         raise HTTPException(status_code=503, detail="Error al obtener los estadios")
 
+@estadios_router.post("/batch-get", response_model=schemas.EstadioBatch)
+async def batch_get_estadios(body: schemas.BatchGet, db: DBSession = Depends(get_read_session)):
+    try:
+        result = await batch_get(db, crud_async.get_estadios_by_ids, body.ids)
+        return list_response(result, schemas.Estadio)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener estadios por id: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener los estadios")
+
+@estadios_router.get("/export")
+async def export_estadios(request: Request, format: Literal["ndjson", "csv"] = "ndjson"):
+    return export_response(models.estadio, format, replica=database.use_replica(request))
+
 @estadios_router.get("/{estadio_id}", response_model=schemas.Estadio)
-async def read_estadio(estadio_id: int, db: Session = Depends(get_db)):
-    estadio = crud.get_estadio(db, estadio_id=estadio_id)
+async def read_estadio(estadio_id: int, db: DBSession = Depends(get_read_session)):
+    estadio = await execute_with_retry(crud_async.get_estadio, db, estadio_id=estadio_id)
     if estadio is None:
         raise HTTPException(status_code=404, detail="Estadio no encontrado")
     return estadio
 
 @estadios_router.delete("/{estadio_id}")
-async def delete_estadio(estadio_id: int, db: Session = Depends(get_db)):
-    if crud.delete_estadio(db, estadio_id=estadio_id):
+async def delete_estadio(estadio_id: int, db: DBSession = Depends(get_session)):
+    if await execute_with_retry(crud_async.delete_estadio, db, estadio_id=estadio_id):
         return {"deleted": True}
     raise HTTPException(status_code=404, detail="Estadio no encontrado")
 
 @estadios_router.put("/{estadio_id}", response_model=schemas.Estadio)
-async def update_estadio(estadio_id: int, estadio: schemas.EstadioCreate, db: Session = Depends(get_db)):
-    updated_estadio = crud.update_estadio(db, estadio_id=estadio_id, estadio=estadio)
+async def update_estadio(estadio_id: int, estadio: schemas.EstadioCreate, db: DBSession = Depends(get_session)):
+    updated_estadio = await execute_with_retry(crud_async.update_estadio, db, estadio_id=estadio_id, estadio=estadio)
     if updated_estadio is None:
         raise HTTPException(status_code=404, detail="Estadio no encontrado")
     return updated_estadio
 
 # Equipos
 @equipos_router.post("/", response_model=schemas.Equipo)
-async def create_equipo(equipo: schemas.EquipoCreate, db: Session = Depends(get_db)):
+async def create_equipo(equipo: schemas.EquipoCreate, db: DBSession = Depends(get_session)):
     try:
-        return crud.create_equipo(db=db, equipo=equipo)
+        return await execute_once(crud_async.create_equipo, db, equipo=equipo)
     except SQLAlchemyError as e:
         raise HTTPException(status_code=503, detail="Error al crear el equipo")
 
-@equipos_router.get("/", response_model=List[schemas.Equipo])
-async def read_equipos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@equipos_router.post("/bulk", response_model=List[schemas.EquipoBulkResult])
+async def create_equipos_bulk(equipos: List[schemas.EquipoCreate], upsert: bool = False, db: DBSession = Depends(get_session)):
+    try:
+        return await execute_once(crud_async.create_equipos_bulk, db, equipos, upsert=upsert)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al crear equipos en bloque: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al crear los equipos")
+
+@equipos_router.get(
+    "/", response_model=Union[schemas.EquipoBatch, List[schemas.EquipoExpanded], schemas.EquipoExpandedPage],
+    response_model_exclude_unset=True
+)
+async def read_equipos(
+    skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), cursor: Optional[str] = None, expand: Optional[str] = None,
+    sort: Optional[str] = None, ids: Optional[str] = None, filters: dict = Depends(equipo_filters),
+    db: DBSession = Depends(get_read_session)
+):
+    check_sort(cursor, sort)
     try:
+        if ids is not None:
+            check_ids(cursor, expand, sort, filters)
+            result = await batch_get(db, crud_async.get_equipos_by_ids, parse_ids(ids))
+            return list_response(result, schemas.Equipo)
+        fields = parse_expand(expand, crud.EQUIPO_EXPAND)
+        if cursor is not None:
+            logger.info(f"Obteniendo equipos (cursor={cursor!r}, limit={limit})")
+            if fields:
+                page = await execute_with_retry(
+                    crud_async.get_equipos_expanded_page, db, fields, cursor=cursor, limit=limit, **filters
+                )
+            else:
+                page = await execute_with_retry(crud_async.get_equipos_page, db, cursor=cursor, limit=limit, **filters)
+            return list_response(page, schemas.Equipo)
         logger.info(f"Obteniendo equipos (skip={skip}, limit={limit})")
-        equipos = execute_with_retry(crud.get_equipos, db, skip=skip, limit=limit)
+        if fields:
+            equipos = await execute_with_retry(
+                crud_async.get_equipos_expanded, db, fields, skip=skip, limit=limit, sort=sort, **filters
+            )
+        else:
+            equipos = await execute_with_retry(crud_async.get_equipos, db, skip=skip, limit=limit, sort=sort, **filters)
         logger.info(f"Se obtuvieron {len(equipos)} equipos")
-        return equipos
+        return list_response(equipos, schemas.Equipo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except SQLAlchemyError as e:
         logger.error(f"Error al obtener equipos: {str(e)}")
         raise HTTPException(status_code=503, detail="Error al obtener los equipos")
 
-@equipos_router.get("/{equipo_id}", response_model=schemas.Equipo)
-async def read_equipo(equipo_id: int, db: Session = Depends(get_db)):
+@equipos_router.post("/batch-get", response_model=schemas.EquipoBatch)
+async def batch_get_equipos(body: schemas.BatchGet, db: DBSession = Depends(get_read_session)):
     try:
-        equipo = crud.get_equipo(db, equipo_id=equipo_id)
+        result = await batch_get(db, crud_async.get_equipos_by_ids, body.ids)
+        return list_response(result, schemas.Equipo)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener equipos por id: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener los equipos")
+
+@equipos_router.get("/export")
+async def export_equipos(request: Request, format: Literal["ndjson", "csv"] = "ndjson"):
+    return export_response(models.equipo, format, replica=database.use_replica(request))
+
+@equipos_router.get("/{equipo_id}", response_model=schemas.EquipoExpanded, response_model_exclude_unset=True)
+async def read_equipo(equipo_id: int, expand: Optional[str] = None, db: DBSession = Depends(get_read_session)):
+    fields = parse_expand(expand, crud.EQUIPO_EXPAND)
+    try:
+        if fields:
+            equipo = await execute_with_retry(crud_async.get_equipo_expanded, db, equipo_id, fields)
+        else:
+            equipo = await execute_with_retry(crud_async.get_equipo, db, equipo_id=equipo_id)
         if equipo is None:
             raise HTTPException(status_code=404, detail="Equipo no encontrado")
         return equipo
@@ -131,92 +445,232 @@ async def read_equipo(equipo_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=503, detail="Error al obtener el equipo")
 
 @equipos_router.delete("/{equipo_id}")
-async def delete_equipo(equipo_id: int, db: Session = Depends(get_db)):
-    if crud.delete_equipo(db, equipo_id=equipo_id):
+async def delete_equipo(equipo_id: int, db: DBSession = Depends(get_session)):
+    if await execute_with_retry(crud_async.delete_equipo, db, equipo_id=equipo_id):
         return {"deleted": True}
     raise HTTPException(status_code=404, detail="Equipo no encontrado")
 
 @equipos_router.put("/{equipo_id}", response_model=schemas.Equipo)
-async def update_equipo(equipo_id: int, equipo: schemas.EquipoCreate, db: Session = Depends(get_db)):
-    updated_equipo = crud.update_equipo(db, equipo_id=equipo_id, equipo=equipo)
+async def update_equipo(equipo_id: int, equipo: schemas.EquipoCreate, db: DBSession = Depends(get_session)):
+    updated_equipo = await execute_with_retry(crud_async.update_equipo, db, equipo_id=equipo_id, equipo=equipo)
     if updated_equipo is None:
         raise HTTPException(status_code=404, detail="Equipo no encontrado")
     return updated_equipo
 
 # Temporadas
 @temporadas_router.post("/", response_model=schemas.Temporada)
-async def create_temporada(temporada: schemas.TemporadaCreate, db: Session = Depends(get_db)):
+async def create_temporada(temporada: schemas.TemporadaCreate, db: DBSession = Depends(get_session)):
     try:
-        return crud.create_temporada(db=db, temporada=temporada)
+        return await execute_once(crud_async.create_temporada, db, temporada=temporada)
     except SQLAlchemyError as e:
         raise HTTPException(status_code=503, detail="Error al crear la temporada")
 
-@temporadas_router.get("/", response_model=List[schemas.Temporada])
-async def read_temporadas(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@temporadas_router.post("/bulk", response_model=List[schemas.TemporadaBulkResult])
+async def create_temporadas_bulk(temporadas: List[schemas.TemporadaCreate], db: DBSession = Depends(get_session)):
     try:
+        return await execute_once(crud_async.create_temporadas_bulk, db, temporadas)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al crear temporadas en bloque: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al crear las temporadas")
+
+@temporadas_router.get("/", response_model=Union[schemas.TemporadaBatch, List[schemas.Temporada], schemas.TemporadaPage])
+async def read_temporadas(
+    skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), cursor: Optional[str] = None, sort: Optional[str] = None,
+    ids: Optional[str] = None, filters: dict = Depends(temporada_filters), db: DBSession = Depends(get_read_session)
+):
+    check_sort(cursor, sort)
+    try:
+        if ids is not None:
+            check_ids(cursor, None, sort, filters)
+            result = await batch_get(db, crud_async.get_temporadas_by_ids, parse_ids(ids))
+            return list_response(result, schemas.Temporada)
+        if cursor is not None:
+            logger.info(f"Obteniendo temporadas (cursor={cursor!r}, limit={limit})")
+            page = await execute_with_retry(crud_async.get_temporadas_page, db, cursor=cursor, limit=limit, **filters)
+            return list_response(page, schemas.Temporada)
         logger.info(f"Obteniendo temporadas (skip={skip}, limit={limit})")
-        temporadas = execute_with_retry(crud.get_temporadas, db, skip=skip, limit=limit)
+        temporadas = await execute_with_retry(crud_async.get_temporadas, db, skip=skip, limit=limit, sort=sort, **filters)
         logger.info(f"Se obtuvieron {len(temporadas)} temporadas")
-        return temporadas
+        return list_response(temporadas, schemas.Temporada)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except SQLAlchemyError as e:
         logger.error(f"Error al obtener temporadas: {str(e)}")
         raise HTTPException(status_code=503, detail="Error al obtener las temporadas")
 
+@temporadas_router.post("/batch-get", response_model=schemas.TemporadaBatch)
+async def batch_get_temporadas(body: schemas.BatchGet, db: DBSession = Depends(get_read_session)):
+    try:
+        result = await batch_get(db, crud_async.get_temporadas_by_ids, body.ids)
+        return list_response(result, schemas.Temporada)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener temporadas por id: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener las temporadas")
+
+@temporadas_router.get("/export")
+async def export_temporadas(request: Request, format: Literal["ndjson", "csv"] = "ndjson"):
+    return export_response(models.temporada, format, replica=database.use_replica(request))
+
 @temporadas_router.get("/{temporada_id}", response_model=schemas.Temporada)
-async def read_temporada(temporada_id: int, db: Session = Depends(get_db)):
+async def read_temporada(temporada_id: int, db: DBSession = Depends(get_read_session)):
     try:
-        temporada = crud.get_temporada(db, temporada_id=temporada_id)
+        temporada = await execute_with_retry(crud_async.get_temporada, db, temporada_id=temporada_id)
         if temporada is None:
             raise HTTPException(status_code=404, detail="Temporada no encontrada")
         return temporada
     except SQLAlchemyError as e:
         raise HTTPException(status_code=503, detail="Error al obtener la temporada")
 
+@temporadas_router.get(
+    "/{temporada_id}/equipos", response_model=List[schemas.EquipoExpanded],
+    response_model_exclude_unset=True
+)
+async def read_equipos_temporada(
+    temporada_id: int, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), expand: Optional[str] = None,
+    db: DBSession = Depends(get_read_session)
+):
+    fields = parse_expand(expand, crud.EQUIPO_EXPAND)
+    try:
+        equipos = await execute_with_retry(
+            crud_async.get_equipos_by_temporada, db, temporada_id, fields, skip=skip, limit=limit
+        )
+        # Solo una página vacía necesita la consulta extra para distinguir
+        # una temporada sin equipos de una que no existe
+        if not equipos and await execute_with_retry(crud_async.get_temporada, db, temporada_id=temporada_id) is None:
+            raise HTTPException(status_code=404, detail="Temporada no encontrada")
+        return list_response(equipos, schemas.Equipo)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener equipos de la temporada: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener los equipos de la temporada")
+
 @temporadas_router.delete("/{temporada_id}")
-async def delete_temporada(temporada_id: int, db: Session = Depends(get_db)):
+async def delete_temporada(temporada_id: int, db: DBSession = Depends(get_session)):
     try:
-        if crud.delete_temporada(db, temporada_id=temporada_id):
+        if await execute_with_retry(crud_async.delete_temporada, db, temporada_id=temporada_id):
             return {"deleted": True}
         raise HTTPException(status_code=404, detail="Temporada no encontrada")
     except SQLAlchemyError as e:
         raise HTTPException(status_code=503, detail="Error al eliminar la temporada")
 
 @temporadas_router.put("/{temporada_id}", response_model=schemas.Temporada)
-async def update_temporada(temporada_id: int, temporada: schemas.TemporadaCreate, db: Session = Depends(get_db)):
-    updated_temporada = crud.update_temporada(db, temporada_id=temporada_id, temporada=temporada)
+async def update_temporada(temporada_id: int, temporada: schemas.TemporadaCreate, db: DBSession = Depends(get_session)):
+    updated_temporada = await execute_with_retry(crud_async.update_temporada, db, temporada_id=temporada_id, temporada=temporada)
     if updated_temporada is None:
         raise HTTPException(status_code=404, detail="Temporada no encontrada")
     return updated_temporada
 
 # Equipo-Temporada
 @equipo_temporada_router.post("/", response_model=schemas.EquipoTemporada)
-async def create_equipo_temporada(equipo_temporada: schemas.EquipoTemporadaCreate, db: Session = Depends(get_db)):
+async def create_equipo_temporada(equipo_temporada: schemas.EquipoTemporadaCreate, db: DBSession = Depends(get_session)):
+    if group_commit.ET_GROUP_COMMIT:
+        result = await group_commit.writer.create(equipo_temporada.equipo_id, equipo_temporada.temporada_id)
+        if result["status"] != "created":
+            raise HTTPException(status_code=409, detail=result["detail"])
+        return equipo_temporada.dict()
     try:
-        return crud.create_equipo_temporada(db=db, equipo_temporada=equipo_temporada)
+        return await execute_once(crud_async.create_equipo_temporada, db, equipo_temporada=equipo_temporada)
     except SQLAlchemyError as e:
         raise HTTPException(status_code=503, detail="Error al crear la relación equipo-temporada")
 
-@equipo_temporada_router.get("/", response_model=List[schemas.EquipoTemporada])
-async def read_equipo_temporada(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@equipo_temporada_router.post("/bulk", response_model=List[schemas.EquipoTemporadaBulkResult])
+async def create_equipo_temporada_bulk(
+    equipo_temporada_list: List[schemas.EquipoTemporadaCreate], upsert: bool = False,
+    db: DBSession = Depends(get_session)
+):
     try:
+        return await execute_once(crud_async.create_equipo_temporada_bulk, db, equipo_temporada_list, upsert=upsert)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al crear relaciones equipo-temporada en bloque: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al crear las relaciones equipo-temporada")
+
+@equipo_temporada_router.get(
+    "/", response_model=Union[
+        schemas.EquipoTemporadaBatch, List[schemas.EquipoTemporadaExpanded], schemas.EquipoTemporadaExpandedPage
+    ],
+    response_model_exclude_unset=True
+)
+async def read_equipo_temporada(
+    skip: int = Query(0, ge=0), limit: int = Query(100, ge=1), cursor: Optional[str] = None, expand: Optional[str] = None,
+    sort: Optional[str] = None, ids: Optional[str] = None, filters: dict = Depends(equipo_temporada_filters),
+    db: DBSession = Depends(get_read_session)
+):
+    check_sort(cursor, sort)
+    try:
+        if ids is not None:
+            check_ids(cursor, expand, sort, filters)
+            result = await batch_get(
+                db, crud_async.get_equipo_temporada_by_keys, parse_keys(ids), ("equipo_id", "temporada_id")
+            )
+            return list_response(result, schemas.EquipoTemporada)
+        fields = parse_expand(expand, crud.EQUIPO_TEMPORADA_EXPAND)
+        if cursor is not None:
+            logger.info(f"Obteniendo relaciones equipo-temporada (cursor={cursor!r}, limit={limit})")
+            if fields:
+                page = await execute_with_retry(
+                    crud_async.get_equipo_temporada_expanded_page, db, fields, cursor=cursor, limit=limit, **filters
+                )
+            else:
+                page = await execute_with_retry(
+                    crud_async.get_equipo_temporada_page, db, cursor=cursor, limit=limit, **filters
+                )
+            return list_response(page, schemas.EquipoTemporada)
         logger.info(f"Obteniendo relaciones equipo-temporada (skip={skip}, limit={limit})")
-        relaciones = execute_with_retry(crud.get_equipo_temporada_list, db, skip=skip, limit=limit)
+        if fields:
+            relaciones = await execute_with_retry(
+                crud_async.get_equipo_temporada_list_expanded, db, fields, skip=skip, limit=limit, sort=sort, **filters
+            )
+        else:
+            relaciones = await execute_with_retry(
+                crud_async.get_equipo_temporada_list, db, skip=skip, limit=limit, sort=sort, **filters
+            )
         logger.info(f"Se obtuvieron {len(relaciones)} relaciones")
-        return relaciones
+        return list_response(relaciones, schemas.EquipoTemporada)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except SQLAlchemyError as e:
         logger.error(f"Error al obtener relaciones equipo-temporada: {str(e)}")
         raise HTTPException(status_code=503, detail="Error al obtener las relaciones equipo-temporada")
 
-@equipo_temporada_router.get("/{equipo_id}/{temporada_id}", response_model=schemas.EquipoTemporada)
-async def read_equipo_temporada_item(equipo_id: int, temporada_id: int, db: Session = Depends(get_db)):
-    equipo_temporada = crud.get_equipo_temporada(db, equipo_id=equipo_id, temporada_id=temporada_id)
+@equipo_temporada_router.post("/batch-get", response_model=schemas.EquipoTemporadaBatch)
+async def batch_get_equipo_temporada(body: schemas.EquipoTemporadaBatchGet, db: DBSession = Depends(get_read_session)):
+    keys = [(key.equipo_id, key.temporada_id) for key in body.keys]
+    try:
+        result = await batch_get(db, crud_async.get_equipo_temporada_by_keys, keys, ("equipo_id", "temporada_id"))
+        return list_response(result, schemas.EquipoTemporada)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener relaciones equipo-temporada por clave: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener las relaciones equipo-temporada")
+
+@equipo_temporada_router.get("/export")
+async def export_equipo_temporada(request: Request, format: Literal["ndjson", "csv"] = "ndjson"):
+    return export_response(models.equipo_temporada, format, replica=database.use_replica(request))
+
+@equipo_temporada_router.get(
+    "/{equipo_id}/{temporada_id}", response_model=schemas.EquipoTemporadaExpanded,
+    response_model_exclude_unset=True
+)
+async def read_equipo_temporada_item(
+    equipo_id: int, temporada_id: int, expand: Optional[str] = None,
+    db: DBSession = Depends(get_read_session)
+):
+    fields = parse_expand(expand, crud.EQUIPO_TEMPORADA_EXPAND)
+    if fields:
+        equipo_temporada = await execute_with_retry(
+            crud_async.get_equipo_temporada_expanded, db, equipo_id, temporada_id, fields
+        )
+    else:
+        equipo_temporada = await execute_with_retry(crud_async.get_equipo_temporada, db, equipo_id=equipo_id, temporada_id=temporada_id)
     if equipo_temporada is None:
         raise HTTPException(status_code=404, detail="Equipo-Temporada no encontrado")
     return equipo_temporada
 
 @equipo_temporada_router.delete("/{equipo_id}/{temporada_id}")
-async def delete_equipo_temporada(equipo_id: int, temporada_id: int, db: Session = Depends(get_db)):
-    if crud.delete_equipo_temporada(db, equipo_id=equipo_id, temporada_id=temporada_id):
+async def delete_equipo_temporada(equipo_id: int, temporada_id: int, db: DBSession = Depends(get_session)):
+    if group_commit.ET_GROUP_COMMIT:
+        deleted = (await group_commit.writer.delete(equipo_id, temporada_id))["status"] == "deleted"
+    else:
+        deleted = await execute_with_retry(crud_async.delete_equipo_temporada, db, equipo_id=equipo_id, temporada_id=temporada_id)
+    if deleted:
         return {"deleted": True}
     raise HTTPException(status_code=404, detail="Equipo-Temporada no encontrado")
 
@@ -224,18 +678,115 @@ async def delete_equipo_temporada(equipo_id: int, temporada_id: int, db: Session
 async def update_equipo_temporada(
     equipo_id: int, temporada_id: int,
     equipo_temporada: schemas.EquipoTemporadaCreate,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_session)
 ):
-    updated_equipo_temporada = crud.update_equipo_temporada(
-        db, equipo_id=equipo_id, temporada_id=temporada_id,
+    updated_equipo_temporada = await execute_with_retry(
+        crud_async.update_equipo_temporada, db, equipo_id=equipo_id, temporada_id=temporada_id,
         equipo_temporada=equipo_temporada
     )
     if updated_equipo_temporada is None:
         raise HTTPException(status_code=404, detail="Equipo-Temporada no encontrado")
     return updated_equipo_temporada
 
+# Estadísticas agregadas en SQL (una fila por grupo)
+@stats_router.get("/temporadas", response_model=List[schemas.TemporadaStats])
+async def read_temporada_stats(db: DBSession = Depends(get_read_session)):
+    try:
+        return await execute_with_retry(crud_async.get_temporada_stats, db)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener estadísticas de temporadas: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener las estadísticas")
+
+@stats_router.get("/equipos", response_model=List[schemas.EquipoGroupStats])
+async def read_equipo_stats(
+    group_by: Literal["estadio", "ciudad", "pais"] = "estadio",
+    db: DBSession = Depends(get_read_session)
+):
+    try:
+        return await execute_with_retry(crud_async.get_equipo_stats, db, group_by)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener estadísticas de equipos: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener las estadísticas")
+
+@stats_router.get("/estadios", response_model=List[schemas.EstadioGroupStats])
+async def read_estadio_stats(
+    group_by: Literal["ciudad", "pais"] = "pais",
+    db: DBSession = Depends(get_read_session)
+):
+    try:
+        return await execute_with_retry(crud_async.get_estadio_stats, db, group_by)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener estadísticas de estadios: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener las estadísticas")
+
+# Registro de cambios: el cliente guarda next_since y pide lo posterior
+def check_change_log():
+    if not crud.CHANGE_LOG:
+        raise HTTPException(status_code=404, detail="El registro de cambios no está activado")
+
+@changes_router.get("", response_model=schemas.CambioPage)
+async def read_changes(
+    since: int = 0, limit: int = Query(100, ge=1, le=CHANGES_MAX_LIMIT),
+    db: DBSession = Depends(get_read_session)
+):
+    check_change_log()
+    try:
+        page = await execute_with_retry(crud_async.get_changes, db, since=since, limit=limit)
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener cambios desde {since}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Error al obtener los cambios")
+    return list_response(page, schemas.Cambio)
+
+# Server-Sent Events: cada evento es una página de /changes con id = next_since,
+# así que un cliente que reconecta con Last-Event-ID continúa donde lo dejó
+@changes_router.get("/stream")
+async def stream_changes(request: Request, since: int = 0):
+    check_change_log()
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    replica = database.use_replica(request)
+
+    async def events(since: int):
+        idle = 0.0
+        while not await request.is_disconnected():
+            try:
+                page = await crud_async.poll_changes(since, CHANGES_MAX_LIMIT, replica)
+            except SQLAlchemyError as e:
+                logger.warning(f"Error al consultar cambios para el stream desde {since}: {str(e)}")
+                page = None
+            if page and page["items"]:
+                since = page["next_since"]
+                idle = 0.0
+                yield f"id: {since}\nevent: changes\ndata: ".encode() + encode(page, schemas.Cambio) + b"\n\n"
+                if page["has_more"]:
+                    continue
+            elif idle >= CHANGE_STREAM_KEEPALIVE:
+                idle = 0.0
+                yield b": keepalive\n\n"
+            await asyncio.sleep(CHANGE_STREAM_POLL_INTERVAL)
+            idle += CHANGE_STREAM_POLL_INTERVAL
+
+    return StreamingResponse(
+        events(since), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Caché
+@app.get("/cache/stats", tags=["Cache"])
+async def read_cache_stats():
+    return cache.stats()
+
+# Métricas en formato Prometheus
+@app.get("/metrics", tags=["Metrics"], include_in_schema=False)
+async def read_metrics():
+    content, content_type = metrics.render()
+    return Response(content=content, headers={"Content-Type": content_type})
+
 # Incluir routers
 app.include_router(estadios_router)
 app.include_router(equipos_router)
 app.include_router(temporadas_router)
-app.include_router(equipo_temporada_router) 
\ No newline at end of file
+app.include_router(equipo_temporada_router)
+app.include_router(stats_router)
+app.include_router(changes_router)
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Request and database metrics in Prometheus format.
+
+The HTTP middleware times every request by route template and keeps a
+per-request count of SQL statements and database time, which SQLAlchemy
+engine events feed through a context variable. Pool events track the
+connections in use and how long a checkout takes. Statements slower than
+SLOW_QUERY_THRESHOLD and requests slower than SLOW_REQUEST_THRESHOLD are
+logged. Metrics are per process; scrape every worker.
+Dependencies: prometheus_client, SQLAlchemy.
+"""
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD", "0.5"))
+SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD", "1.0"))
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Duración de las peticiones HTTP",
+    ["method", "route", "status"]
+)
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request", "Sentencias SQL ejecutadas por petición",
+    ["route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+REQUEST_DB_TIME = Histogram(
+    "db_time_per_request_seconds", "Tiempo en base de datos por petición", ["route"]
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Duración de las sentencias SQL", ["engine"]
+)
+POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Espera para obtener una conexión del pool", ["engine"]
+)
+POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use", "Conexiones del pool prestadas", ["engine"]
+)
+DB_RETRIES = Counter(
+    "db_retries_total", "Reintentos de operaciones de base de datos", ["operation"]
+)
+GROUP_COMMIT_BATCH = Histogram(
+    "group_commit_batch_size", "Operaciones aplicadas por transacción del group commit",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request() -> RequestStats:
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def route_label(request) -> str:
+    # Plantilla de la ruta (/equipos/{equipo_id}) para no crear una serie por id
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def observe_request(request, status: int, elapsed: float, stats: RequestStats):
+    route = route_label(request)
+    REQUEST_LATENCY.labels(request.method, route, str(status)).observe(elapsed)
+    REQUEST_QUERIES.labels(route).observe(stats.queries)
+    REQUEST_DB_TIME.labels(route).observe(stats.db_time)
+    if elapsed >= SLOW_REQUEST_THRESHOLD:
+        logger.warning(
+            f"Petición lenta: {request.method} {route} -> {status} en {elapsed:.2f}s "
+            f"({stats.queries} consultas, {stats.db_time:.2f}s en base de datos)"
+        )
+
+
+def record_retry(operation: str):
+    DB_RETRIES.labels(operation).inc()
+
+
+def observe_group_commit(size: int):
+    GROUP_COMMIT_BATCH.observe(size)
+
+
+def _time_checkout(pool, name: str):
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_CHECKOUT.labels(name).observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+
+
+def instrument_engine(engine, name: str):
+    """
+    Registra los eventos de métricas en un Engine síncrono (para un motor
+    asíncrono, su sync_engine)
+    """
+    query_latency = QUERY_LATENCY.labels(name)
+    in_use = POOL_IN_USE.labels(name)
+    event.listen(engine, "checkout", lambda *args: in_use.inc())
+    event.listen(engine, "checkin", lambda *args: in_use.dec())
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        query_latency.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+        if elapsed >= SLOW_QUERY_THRESHOLD:
+            logger.warning(f"Consulta lenta en {name} ({elapsed:.3f}s): {statement[:1000]}")
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    # dispose() sustituye el pool; los eventos se conservan, el cronómetro no
+    @event.listens_for(engine, "engine_disposed")
+    def engine_disposed(engine):
+        _time_checkout(engine.pool, name)
+
+    _time_checkout(engine.pool, name)
+
+
+def render():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, String, BigInteger, Numeric, Date, ForeignKey, MetaData, Enum
+from sqlalchemy import Table, Column, Integer, String, BigInteger, Numeric, Date, DateTime, JSON, ForeignKey, MetaData, Enum, Index, func
 from .database import metadata
 
 estadio = Table(
@@ -35,4 +35,39 @@ equipo_temporada = Table(
     metadata,
     Column("equipo_id", BigInteger, ForeignKey("equipo.equipo_id", ondelete="CASCADE"), primary_key=True),
     Column("temporada_id", BigInteger, ForeignKey("temporada.temporada_id", ondelete="CASCADE"), primary_key=True),
-) 
\ No newline at end of file
+)
+
+# Resumen por temporada para /stats/temporadas (STATS_SUMMARY), mantenido
+# por las funciones de escritura de crud.py (ver migrations/versions/0004)
+temporada_resumen = Table(
+    "temporada_resumen",
+    metadata,
+    Column("temporada_id", BigInteger, ForeignKey("temporada.temporada_id", ondelete="CASCADE"), primary_key=True),
+    Column("equipos", Integer, nullable=False),
+    Column("presupuesto_total", Numeric(18, 2), nullable=False),
+    Column("capacidad_total", BigInteger, nullable=False),
+)
+
+# Registro de cambios para GET /changes (CHANGE_LOG), escrito por las funciones
+# de escritura de crud.py (ver migrations/versions/0005). clave es la clave
+# primaria de la fila antes del cambio; datos, la fila tras un insert o update
+cambio = Table(
+    "cambio",
+    metadata,
+    Column("seq", BigInteger, primary_key=True),
+    Column("tabla", String(50), nullable=False),
+    Column("operacion", String(10), nullable=False),
+    Column("clave", JSON, nullable=False),
+    Column("datos", JSON),
+    Column("creado_en", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+# Índices para los patrones de acceso de la API (ver migrations/versions/0002)
+Index("ix_equipo_estadio_id", equipo.c.estadio_id)
+Index("ix_equipo_temporada_temporada_id", equipo_temporada.c.temporada_id)
+Index("ix_temporada_anios", temporada.c["año_inicio"], temporada.c["año_fin"])
+# Filtros de los listados (ver migrations/versions/0003)
+Index("ix_estadio_ciudad", estadio.c.ciudad)
+Index("ix_estadio_pais", estadio.c.pais)
+Index("ix_equipo_presupuesto", equipo.c.presupuesto)
+Index("ix_equipo_fecha_fundacion", equipo.c.fecha_fundacion)
@@ -0,0 +1,55 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Cursors are opaque url-safe base64 strings wrapping the primary key of the
+last row of a page. The next page is read with `WHERE pk > :last ORDER BY pk`,
+so its cost doesn't grow with how deep the client has paged.
+"""
+import base64
+import json
+from typing import Optional, Sequence
+from sqlalchemy import tuple_
+
+
+def encode_cursor(*key) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple:
+    """
+    Decodifica un cursor; lanza ValueError si no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
+    if not isinstance(key, list) or len(key) != size or not all(isinstance(k, int) for k in key):
+        raise ValueError("Cursor inválido")
+    return tuple(key)
+
+
+def keyset_page(query, key_columns: Sequence, cursor: Optional[str], limit: int, key_names: Optional[Sequence[str]] = None):
+    """
+    Devuelve una página ordenada por key_columns a partir del cursor, junto
+    con el cursor de la página siguiente (None si no hay más filas).
+    key_names indica cómo se llaman las claves en la fila si se seleccionaron
+    con otra etiqueta
+    """
+    if limit <= 0:
+        return {"items": [], "next_cursor": None}
+    if cursor:
+        key = decode_cursor(cursor, len(key_columns))
+        if len(key_columns) == 1:
+            query = query.filter(key_columns[0] > key[0])
+        else:
+            query = query.filter(tuple_(*key_columns) > tuple_(*key))
+    rows = query.order_by(*key_columns).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        names = key_names or [column.key for column in key_columns]
+        next_cursor = encode_cursor(*(getattr(last, name) for name in names))
+    return {"items": rows, "next_cursor": next_cursor}
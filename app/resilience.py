@@ -0,0 +1,173 @@
+"""
+Retry policy and circuit breaker for database calls.
+
+execute_with_retry retries OperationalError with capped exponential backoff
+and jitter, sleeping with asyncio so the event loop keeps serving other
+requests. All attempts of one call share a deadline. With an AsyncSession
+each attempt runs under asyncio.wait_for with the time that is left, so a
+hung query is cancelled and the call ends with DeadlineExceededError (503).
+A sync session's attempt runs in a worker thread that cannot be interrupted
+without leaving the session in use, so there the deadline only stops further
+retries and statement_timeout bounds the query itself. After repeated
+failures the circuit opens and calls fail fast with CircuitOpenError (503)
+until a single half-open probe succeeds. Inserts and chunked bulk writes
+cannot be repeated safely (a commit that landed before the error would be
+applied twice), so they go through execute_once: same breaker, no retries.
+Dependencies: SQLAlchemy.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .metrics import record_retry
+
+logger = logging.getLogger(__name__)
+
+DB_RETRY_ATTEMPTS = int(os.getenv("DB_RETRY_ATTEMPTS", "3"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.1"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "2"))
+DB_REQUEST_DEADLINE = float(os.getenv("DB_REQUEST_DEADLINE", "10"))
+DB_BREAKER_THRESHOLD = int(os.getenv("DB_BREAKER_THRESHOLD", "5"))
+DB_BREAKER_RESET_TIMEOUT = float(os.getenv("DB_BREAKER_RESET_TIMEOUT", "30"))
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Circuito de base de datos abierto")
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    def __init__(self, deadline: float):
+        super().__init__(f"La operación de base de datos superó el plazo de {deadline:g}s")
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = DB_BREAKER_THRESHOLD, reset_timeout: float = DB_BREAKER_RESET_TIMEOUT):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def before_call(self) -> bool:
+        """
+        Lanza CircuitOpenError si el circuito no admite la llamada; devuelve
+        True si la llamada es la sonda del estado semiabierto
+        """
+        if self.state == self.CLOSED:
+            return False
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        raise CircuitOpenError(max(remaining, 1.0))
+
+    def record_success(self, probe: bool):
+        if self.state != self.CLOSED:
+            logger.info("Circuito de base de datos cerrado")
+        self.state = self.CLOSED
+        self.failures = 0
+        if probe:
+            self.probe_in_flight = False
+
+    def record_failure(self, probe: bool):
+        self.failures += 1
+        if probe or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                logger.error(f"Circuito de base de datos abierto tras {self.failures} fallos")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        if probe:
+            self.probe_in_flight = False
+
+    def record_other(self, probe: bool):
+        # Una sonda que termina con otro error no decide el estado del circuito
+        if probe:
+            self.probe_in_flight = False
+
+
+breaker = CircuitBreaker()
+
+
+async def _rollback(db):
+    try:
+        if isinstance(db, AsyncSession):
+            await db.rollback()
+        else:
+            await run_in_threadpool(db.rollback)
+    except SQLAlchemyError as e:
+        logger.warning(f"Error al deshacer la transacción antes de reintentar: {str(e)}")
+
+
+async def execute_with_retry(func, db, *args, **kwargs):
+    """
+    Ejecuta await func(db, *args, **kwargs) reintentando los OperationalError
+    sin bloquear el event loop y sin superar DB_REQUEST_DEADLINE en total; con
+    AsyncSession cada intento se cancela al agotarse el plazo
+    """
+    deadline = time.monotonic() + DB_REQUEST_DEADLINE
+    attempt = 0
+    while True:
+        probe = breaker.before_call()
+        attempt += 1
+        try:
+            call = func(db, *args, **kwargs)
+            if isinstance(db, AsyncSession):
+                call = asyncio.wait_for(call, deadline - time.monotonic())
+            result = await call
+        except asyncio.TimeoutError:
+            breaker.record_failure(probe)
+            logger.warning(f"Operación {func.__name__} cancelada al superar DB_REQUEST_DEADLINE")
+            raise DeadlineExceededError(DB_REQUEST_DEADLINE) from None
+        except OperationalError as e:
+            breaker.record_failure(probe)
+            delay = min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            delay = random.uniform(delay / 2, delay)
+            if (
+                attempt >= DB_RETRY_ATTEMPTS
+                or breaker.state == CircuitBreaker.OPEN
+                or time.monotonic() + delay >= deadline
+            ):
+                raise
+            record_retry(func.__name__)
+            logger.warning(f"Error de conexión, reintento {attempt}/{DB_RETRY_ATTEMPTS - 1} en {delay:.2f}s: {str(e)}")
+            await _rollback(db)
+            await asyncio.sleep(delay)
+        except BaseException:
+            breaker.record_other(probe)
+            raise
+        else:
+            breaker.record_success(probe)
+            return result
+
+
+async def execute_once(func, db, *args, **kwargs):
+    """
+    Ejecuta await func(db, *args, **kwargs) a través del circuit breaker pero
+    sin reintentos, para escrituras que no son idempotentes
+    """
+    probe = breaker.before_call()
+    try:
+        result = await func(db, *args, **kwargs)
+    except OperationalError:
+        breaker.record_failure(probe)
+        raise
+    except BaseException:
+        breaker.record_other(probe)
+        raise
+    breaker.record_success(probe)
+    return result
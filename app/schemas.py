@@ -1,6 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional
-from datetime import date
+from typing import List, Optional, Union
+from datetime import date, datetime
+
+class BatchGet(BaseModel):
+    ids: List[int]
+
+class BulkResult(BaseModel):
+    index: int
+    status: str
+    detail: Optional[str] = None
 
 class EstadioBase(BaseModel):
     nombre: str
@@ -16,6 +24,21 @@ class Estadio(EstadioBase):
     class Config:
         orm_mode = True
 
+class EstadioPage(BaseModel):
+    items: List[Estadio]
+    next_cursor: Optional[str] = None
+    class Config:
+        orm_mode = True
+
+class EstadioBulkResult(BulkResult):
+    data: Optional[Estadio] = None
+
+class EstadioBatch(BaseModel):
+    items: List[Optional[Estadio]]
+    missing: List[int]
+    class Config:
+        orm_mode = True
+
 class EquipoBase(BaseModel):
     nombre: str
     estadio_id: int
@@ -30,6 +53,30 @@ class Equipo(EquipoBase):
     class Config:
         orm_mode = True
 
+class EquipoPage(BaseModel):
+    items: List[Equipo]
+    next_cursor: Optional[str] = None
+    class Config:
+        orm_mode = True
+
+class EquipoBulkResult(BulkResult):
+    data: Optional[Equipo] = None
+
+class EquipoBatch(BaseModel):
+    items: List[Optional[Equipo]]
+    missing: List[int]
+    class Config:
+        orm_mode = True
+
+class EquipoExpanded(Equipo):
+    estadio: Optional[Estadio] = None
+
+class EquipoExpandedPage(BaseModel):
+    items: List[EquipoExpanded]
+    next_cursor: Optional[str] = None
+    class Config:
+        orm_mode = True
+
 class TemporadaBase(BaseModel):
     año_inicio: int
     año_fin: int
@@ -43,6 +90,21 @@ class Temporada(TemporadaBase):
     class Config:
         orm_mode = True
 
+class TemporadaPage(BaseModel):
+    items: List[Temporada]
+    next_cursor: Optional[str] = None
+    class Config:
+        orm_mode = True
+
+class TemporadaBulkResult(BulkResult):
+    data: Optional[Temporada] = None
+
+class TemporadaBatch(BaseModel):
+    items: List[Optional[Temporada]]
+    missing: List[int]
+    class Config:
+        orm_mode = True
+
 class EquipoTemporadaBase(BaseModel):
     equipo_id: int
     temporada_id: int
@@ -52,4 +114,71 @@ class EquipoTemporadaCreate(EquipoTemporadaBase):
 
 class EquipoTemporada(EquipoTemporadaBase):
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True
+
+class EquipoTemporadaPage(BaseModel):
+    items: List[EquipoTemporada]
+    next_cursor: Optional[str] = None
+    class Config:
+        orm_mode = True
+
+class EquipoTemporadaBulkResult(BulkResult):
+    data: Optional[EquipoTemporada] = None
+
+class EquipoTemporadaBatch(BaseModel):
+    items: List[Optional[EquipoTemporada]]
+    missing: List[EquipoTemporadaBase]
+    class Config:
+        orm_mode = True
+
+class EquipoTemporadaBatchGet(BaseModel):
+    keys: List[EquipoTemporadaBase]
+
+class EquipoTemporadaExpanded(EquipoTemporada):
+    equipo: Optional[EquipoExpanded] = None
+    temporada: Optional[Temporada] = None
+
+class EquipoTemporadaExpandedPage(BaseModel):
+    items: List[EquipoTemporadaExpanded]
+    next_cursor: Optional[str] = None
+    class Config:
+        orm_mode = True
+
+class TemporadaStats(BaseModel):
+    temporada_id: int
+    nombre_temporada: str
+    año_inicio: int
+    equipos: int
+    presupuesto_total: float
+    capacidad_total: int
+    class Config:
+        orm_mode = True
+
+class EquipoGroupStats(BaseModel):
+    grupo: Union[int, str]
+    equipos: int
+    presupuesto_total: float
+    class Config:
+        orm_mode = True
+
+class EstadioGroupStats(BaseModel):
+    grupo: str
+    estadios: int
+    capacidad_total: int
+    class Config:
+        orm_mode = True
+
+class Cambio(BaseModel):
+    seq: int
+    tabla: str
+    operacion: str
+    clave: dict
+    datos: Optional[dict] = None
+    creado_en: datetime
+    class Config:
+        orm_mode = True
+
+class CambioPage(BaseModel):
+    items: List[Cambio]
+    next_since: int
+    has_more: bool
\ No newline at end of file
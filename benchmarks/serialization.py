@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: FastAPI response_model serialization versus fast_json.
+
+Rows are real SQLAlchemy rows read from an in-memory SQLite database, so no
+server is needed. The FastAPI path is the one the list routes use by default:
+validation through response_model followed by JSONResponse rendering.
+
+    python -m benchmarks.serialization --rows 100
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import BigInteger, create_engine, select
+from sqlalchemy.ext.compiler import compiles
+
+from app import models, schemas
+from app.fast_json import encode
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    return "INTEGER"
+
+
+def load_rows(count):
+    engine = create_engine("sqlite://")
+    models.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.estadio.insert(), [
+            {"nombre": f"Estadio {i}", "capacidad": 10000 + i, "ciudad": "Bilbao", "pais": "España"}
+            for i in range(count)
+        ])
+        conn.execute(models.equipo.insert(), [
+            {"nombre": f"Equipo {i}", "estadio_id": 1 + i, "fecha_fundacion": date(1898, 1, 1), "presupuesto": "123456.78"}
+            for i in range(count)
+        ])
+        conn.execute(models.temporada.insert(), [
+            {"año_inicio": 1900 + i, "año_fin": 1901 + i, "nombre_temporada": f"{1900 + i}/{1901 + i}"}
+            for i in range(count)
+        ])
+        conn.execute(models.equipo_temporada.insert(), [
+            {"equipo_id": 1 + i, "temporada_id": 1 + i} for i in range(count)
+        ])
+        return {
+            schemas.Estadio: conn.execute(select(models.estadio)).all(),
+            schemas.Equipo: conn.execute(select(models.equipo)).all(),
+            schemas.Temporada: conn.execute(select(models.temporada)).all(),
+            schemas.EquipoTemporada: conn.execute(select(models.equipo_temporada)).all(),
+        }
+
+
+async def fastapi_path(field, rows):
+    content = await serialize_response(field=field, response_content=rows)
+    return JSONResponse(content).body
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    for schema, rows in load_rows(args.rows).items():
+        field = create_response_field(name="response", type_=List[schema])
+        slow = timed(lambda: loop.run_until_complete(fastapi_path(field, rows)), args.repeat)
+        fast = timed(lambda: encode(rows, schema), args.repeat)
+        print(f"{schema.__name__:16} response_model={slow:8.1f} us  fast_json={fast:8.1f} us  x{slow / fast:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Alembic environment wired to app.database.metadata and DATABASE_URL.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from app import models  # noqa: F401  registra las tablas en metadata
+from app.database import DATABASE_URL, engine, metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = metadata
+
+
+def run_migrations_offline():
+    context.configure(url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,57 @@
+"""baseline schema
+
+Creates the four tables as they exist in production. Existing databases
+already have them and should be stamped instead of upgraded:
+
+    alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "estadio",
+        sa.Column("estadio_id", sa.BigInteger, primary_key=True),
+        sa.Column("nombre", sa.String(100), nullable=False, unique=True),
+        sa.Column("capacidad", sa.Integer, nullable=False),
+        sa.Column("ciudad", sa.String(100), nullable=False),
+        sa.Column("pais", sa.String(100), nullable=False),
+    )
+    op.create_table(
+        "equipo",
+        sa.Column("equipo_id", sa.BigInteger, primary_key=True),
+        sa.Column("nombre", sa.String(100), nullable=False, unique=True),
+        sa.Column("estadio_id", sa.BigInteger, sa.ForeignKey("estadio.estadio_id", ondelete="RESTRICT"), nullable=False),
+        sa.Column("fecha_fundacion", sa.Date, nullable=False),
+        sa.Column("presupuesto", sa.Numeric(15, 2), nullable=False),
+    )
+    op.create_table(
+        "temporada",
+        sa.Column("temporada_id", sa.BigInteger, primary_key=True),
+        sa.Column("año_inicio", sa.Integer, nullable=False),
+        sa.Column("año_fin", sa.Integer, nullable=False),
+        sa.Column("nombre_temporada", sa.String(100), nullable=False),
+    )
+    op.create_table(
+        "equipo_temporada",
+        sa.Column("equipo_id", sa.BigInteger, sa.ForeignKey("equipo.equipo_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("temporada_id", sa.BigInteger, sa.ForeignKey("temporada.temporada_id", ondelete="CASCADE"), primary_key=True),
+    )
+
+
+def downgrade():
+    op.drop_table("equipo_temporada")
+    op.drop_table("temporada")
+    op.drop_table("equipo")
+    op.drop_table("estadio")
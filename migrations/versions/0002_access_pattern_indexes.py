@@ -0,0 +1,38 @@
+"""indexes for the API access patterns
+
+- equipo.estadio_id: expand=estadio joins and per-stadium filters.
+- equipo_temporada.temporada_id: the composite primary key only serves
+  equipo-first lookups, so listing the teams of one season scanned the table.
+- temporada(año_inicio, año_fin): lookups of a season by its years.
+
+On PostgreSQL the indexes are built CONCURRENTLY so the tables stay writable.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_equipo_estadio_id", "equipo", ["estadio_id"]),
+    ("ix_equipo_temporada_temporada_id", "equipo_temporada", ["temporada_id"]),
+    ("ix_temporada_anios", "temporada", ["año_inicio", "año_fin"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
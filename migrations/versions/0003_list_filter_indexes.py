@@ -0,0 +1,39 @@
+"""indexes for the list filters
+
+- estadio.ciudad and estadio.pais: equality filters on the estadios list.
+- equipo.presupuesto and equipo.fecha_fundacion: range filters and sorts on
+  the equipos list.
+
+equipo.estadio_id, equipo_temporada.temporada_id and temporada.año_inicio
+are already covered by 0002.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_estadio_ciudad", "estadio", ["ciudad"]),
+    ("ix_estadio_pais", "estadio", ["pais"]),
+    ("ix_equipo_presupuesto", "equipo", ["presupuesto"]),
+    ("ix_equipo_fecha_fundacion", "equipo", ["fecha_fundacion"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,46 @@
+"""temporada_resumen summary table
+
+Per-season team count, budget total and stadium capacity total, served by
+/stats/temporadas when STATS_SUMMARY is enabled. The crud write functions
+keep it up to date; the upgrade fills it once from the current data.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "temporada_resumen",
+        sa.Column(
+            "temporada_id", sa.BigInteger,
+            sa.ForeignKey("temporada.temporada_id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("equipos", sa.Integer, nullable=False),
+        sa.Column("presupuesto_total", sa.Numeric(18, 2), nullable=False),
+        sa.Column("capacidad_total", sa.BigInteger, nullable=False),
+    )
+    op.execute(
+        """
+        INSERT INTO temporada_resumen (temporada_id, equipos, presupuesto_total, capacidad_total)
+        SELECT t.temporada_id, count(e.equipo_id), coalesce(sum(e.presupuesto), 0), coalesce(sum(s.capacidad), 0)
+        FROM temporada t
+        LEFT JOIN equipo_temporada et ON et.temporada_id = t.temporada_id
+        LEFT JOIN equipo e ON e.equipo_id = et.equipo_id
+        LEFT JOIN estadio s ON s.estadio_id = e.estadio_id
+        GROUP BY t.temporada_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("temporada_resumen")
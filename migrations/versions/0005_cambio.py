@@ -0,0 +1,35 @@
+"""cambio change log
+
+One row per insert, update or delete done through the crud write functions
+when CHANGE_LOG is enabled, served by GET /changes and /changes/stream so
+clients can sync incrementally from a sequence number. seq is assigned in
+commit order.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "cambio",
+        sa.Column("seq", sa.BigInteger, primary_key=True),
+        sa.Column("tabla", sa.String(50), nullable=False),
+        sa.Column("operacion", sa.String(10), nullable=False),
+        sa.Column("clave", sa.JSON, nullable=False),
+        sa.Column("datos", sa.JSON),
+        sa.Column("creado_en", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("cambio")
@@ -0,0 +1,58 @@
+"""
+Shared test fixtures: the app runs against a throwaway SQLite database.
+
+The environment is fixed before app is imported, so a DATABASE_URL set in
+the shell never reaches the tests (they drop and recreate every table).
+Dependencies: pytest, httpx, anyio (its pytest plugin runs the async tests).
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+_tmpdir = tempfile.mkdtemp(prefix="futbol-tests-")
+atexit.register(shutil.rmtree, _tmpdir, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+for name in ("ASYNC_DATABASE_URL", "REPLICA_DATABASE_URL", "ASYNC_REPLICA_DATABASE_URL"):
+    os.environ.pop(name, None)
+os.environ["DB_ASYNC"] = "false"
+os.environ["CACHE_ENABLED"] = "false"
+
+import httpx
+import pytest
+from sqlalchemy import BigInteger, event
+from sqlalchemy.ext.compiler import compiles
+
+from app import database, models
+from app.main import app
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_big_integer(type_, compiler, **kw):
+    # SQLite solo autoincrementa las claves INTEGER PRIMARY KEY
+    return "INTEGER"
+
+
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def engine():
+    engine = database.engine
+    if not event.contains(engine, "connect", _sqlite_foreign_keys):
+        event.listen(engine, "connect", _sqlite_foreign_keys)
+    models.metadata.drop_all(engine)
+    models.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+async def client(engine):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
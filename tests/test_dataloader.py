@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.dataloader import DataLoader
+
+
+def recording_loader(calls, max_batch_size=None):
+    async def batch_fn(keys):
+        calls.append(list(keys))
+        # La clave 3 no existe
+        return {key: key * 10 for key in keys if key != 3}
+    return DataLoader(batch_fn, max_batch_size)
+
+
+@pytest.mark.anyio
+async def test_loads_in_the_same_turn_share_one_batch():
+    calls = []
+    loader = recording_loader(calls)
+    results = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(3))
+    assert results == [10, 20, 10, None]
+    assert calls == [[1, 2, 3]]
+
+
+@pytest.mark.anyio
+async def test_each_key_is_fetched_once_per_loader():
+    calls = []
+    loader = recording_loader(calls)
+    assert await loader.load_many([1, 3]) == [10, None]
+    assert await loader.load_many([1, 2, 3]) == [10, 20, None]
+    assert calls == [[1, 3], [2]]
+
+
+@pytest.mark.anyio
+async def test_max_batch_size_splits_the_batch():
+    calls = []
+    loader = recording_loader(calls, max_batch_size=2)
+    assert await loader.load_many([1, 2, 4, 5, 6]) == [10, 20, 40, 50, 60]
+    assert calls == [[1, 2], [4, 5], [6]]
+
+
+@pytest.mark.anyio
+async def test_failures_are_not_cached():
+    attempts = []
+
+    async def batch_fn(keys):
+        attempts.append(list(keys))
+        if len(attempts) == 1:
+            raise RuntimeError("fallo transitorio")
+        return {key: key for key in keys}
+
+    loader = DataLoader(batch_fn)
+    with pytest.raises(RuntimeError):
+        await loader.load(7)
+    assert await loader.load(7) == 7
+    assert attempts == [[7], [7]]
@@ -0,0 +1,93 @@
+"""
+Memory use of the streaming export.
+
+Drives the ASGI app directly with a `send` that drops each body chunk once
+counted (httpx's ASGI transport would buffer the whole body), and samples
+this process's RSS between chunks. Streaming keeps the growth over the RSS
+before the request bounded by one batch; encoding the whole table at once
+grows it by about 40 MB at this size.
+"""
+import asyncio
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.main import app
+
+EQUIPOS = 2000
+TEMPORADAS = 100
+MAX_GROWTH_MB = 20
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+@pytest.fixture
+def league(engine):
+    with engine.begin() as conn:
+        conn.execute(models.estadio.insert(), [{"estadio_id": 1, "nombre": "E", "capacidad": 1, "ciudad": "M", "pais": "E"}])
+        conn.execute(models.equipo.insert(), [
+            {"equipo_id": e, "nombre": f"Equipo {e}", "estadio_id": 1, "fecha_fundacion": date(1900, 1, 1), "presupuesto": e}
+            for e in range(1, EQUIPOS + 1)
+        ])
+        conn.execute(models.temporada.insert(), [
+            {"temporada_id": t, "año_inicio": 1900 + t, "año_fin": 1901 + t, "nombre_temporada": f"T{t}"}
+            for t in range(1, TEMPORADAS + 1)
+        ])
+        # Producto cartesiano en SQL: sembrar desde Python dejaría memoria
+        # libre en el proceso que luego ocultaría el crecimiento
+        conn.execute(models.equipo_temporada.insert().from_select(
+            ["equipo_id", "temporada_id"],
+            select(models.equipo.c.equipo_id, models.temporada.c.temporada_id)
+        ))
+    return engine
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="requiere /proc (Linux)")
+@pytest.mark.anyio
+async def test_export_streams_in_bounded_memory(league):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/equipo_temporada/export", "raw_path": b"/equipo_temporada/export",
+        "root_path": "", "query_string": b"format=ndjson", "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    status, lines, samples = None, 0, []
+
+    async def send(message):
+        nonlocal status, lines
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            lines += message.get("body", b"").count(b"\n")
+            samples.append(rss_mb())
+            if not message.get("more_body", False):
+                finished.set()
+
+    # Línea base tras sembrar: la conexión ya está abierta y los módulos cargados
+    baseline = rss_mb()
+    await app(scope, receive, send)
+
+    assert status == 200
+    assert lines == EQUIPOS * TEMPORADAS
+    growth = max(samples) - baseline
+    assert growth <= MAX_GROWTH_MB, f"RSS creció {growth:.1f} MB durante la exportación"
@@ -0,0 +1,46 @@
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.group_commit import GroupCommitWriter
+
+
+@pytest.fixture
+def league(engine):
+    with engine.begin() as conn:
+        conn.execute(models.estadio.insert(), [{"estadio_id": 1, "nombre": "E", "capacidad": 1, "ciudad": "M", "pais": "E"}])
+        conn.execute(models.equipo.insert(), [
+            {"equipo_id": 1, "nombre": "Q", "estadio_id": 1, "fecha_fundacion": date(1900, 1, 1), "presupuesto": 1}
+        ])
+        conn.execute(models.temporada.insert(), [
+            {"temporada_id": t, "año_inicio": 2000 + t, "año_fin": 2001 + t, "nombre_temporada": f"T{t}"}
+            for t in (1, 2, 3)
+        ])
+        conn.execute(models.equipo_temporada.insert(), [
+            {"equipo_id": 1, "temporada_id": 2}, {"equipo_id": 1, "temporada_id": 3}
+        ])
+    return engine
+
+
+@pytest.mark.anyio
+async def test_one_batch_resolves_each_operation_on_its_own(league):
+    writer = GroupCommitWriter(window_ms=50)
+    results = await asyncio.gather(
+        writer.create(1, 1),
+        writer.create(1, 2),
+        writer.create(99, 1),
+        writer.delete(1, 3),
+        writer.delete(1, 1),
+        writer.delete(5, 5),
+    )
+    await writer.close()
+
+    assert [result["status"] for result in results] == [
+        "created", "conflict", "error", "deleted", "deleted", "not_found"
+    ]
+    with league.connect() as conn:
+        rows = conn.execute(select(models.equipo_temporada.c.equipo_id, models.equipo_temporada.c.temporada_id))
+        assert sorted(map(tuple, rows)) == [(1, 2)]
@@ -0,0 +1,25 @@
+"""
+Import-time budget for app.main, run as part of the test suite.
+
+Reuses benchmarks.import_time: fresh interpreters under `python -X
+importtime` with an unreachable DATABASE_URL. The budget comes from
+IMPORT_TIME_BUDGET_MS (1000 ms by default).
+"""
+import os
+import statistics
+from pathlib import Path
+
+from benchmarks.import_time import import_once
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1000"))
+RUNS = 3
+
+
+def test_import_app_main_within_budget(monkeypatch):
+    monkeypatch.chdir(Path(__file__).resolve().parents[1])
+    runs = [import_once() for _ in range(RUNS)]
+    total = statistics.median(modules["app.main"][1] / 1000 for modules, _, _ in runs)
+    assert total <= IMPORT_TIME_BUDGET_MS, f"import de app.main en {total:.0f} ms"
+    for _, no_engines, drivers in runs:
+        assert no_engines, "importar app.main crea los motores de base de datos"
+        assert not drivers, f"importar app.main carga drivers de base de datos: {drivers}"
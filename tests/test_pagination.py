@@ -0,0 +1,64 @@
+import pytest
+
+from app import models
+from app.database import SessionLocal
+from app.pagination import decode_cursor, encode_cursor, keyset_page
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42), 1) == (42,)
+    assert decode_cursor(encode_cursor(7, 2024), 2) == (7, 2024)
+
+
+@pytest.mark.parametrize("cursor", ["no-es-base64!", encode_cursor(1, 2), encode_cursor("1")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 1)
+
+
+@pytest.fixture
+def estadio_ids(engine):
+    with engine.begin() as conn:
+        conn.execute(models.estadio.insert(), [
+            {"nombre": f"Estadio {i}", "capacidad": 1000 + i, "ciudad": "Madrid", "pais": "España"}
+            for i in range(5)
+        ])
+        return [row[0] for row in conn.execute(models.estadio.select().with_only_columns(models.estadio.c.estadio_id))]
+
+
+def test_keyset_page_walks_every_row_once(estadio_ids):
+    key = [models.estadio.c.estadio_id]
+    seen, cursor = [], None
+    with SessionLocal() as db:
+        while True:
+            page = keyset_page(db.query(models.estadio), key, cursor, 2)
+            seen += [row.estadio_id for row in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+    assert seen == sorted(estadio_ids)
+
+
+def test_keyset_page_limit_zero(estadio_ids):
+    with SessionLocal() as db:
+        page = keyset_page(db.query(models.estadio), [models.estadio.c.estadio_id], None, 0)
+    assert page == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.anyio
+async def test_cursor_route_round_trip(client, estadio_ids):
+    seen, cursor = [], ""
+    while cursor is not None:
+        response = await client.get("/estadios/", params={"cursor": cursor, "limit": 2})
+        assert response.status_code == 200
+        body = response.json()
+        seen += [estadio["estadio_id"] for estadio in body["items"]]
+        cursor = body["next_cursor"]
+    assert seen == sorted(estadio_ids)
+
+
+@pytest.mark.anyio
+async def test_list_routes_reject_limit_zero(client):
+    for path in ("/estadios/", "/equipos/", "/temporadas/", "/equipo_temporada/"):
+        response = await client.get(path, params={"limit": 0})
+        assert response.status_code == 422, path
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import resilience
+from app.database import SessionLocal
+from app.resilience import CircuitBreaker, CircuitOpenError, execute_with_retry
+
+
+def expire(breaker):
+    # Simula que ha pasado reset_timeout desde que se abrió
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_circuit_breaker_cycle():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+    assert breaker.before_call() is False
+    breaker.record_failure(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.before_call()
+    assert exc.value.retry_after > 0
+
+    expire(breaker)
+    assert breaker.before_call() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Solo una sonda a la vez
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens_circuit():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    breaker.record_failure(False)
+    expire(breaker)
+    probe = breaker.before_call()
+    breaker.record_failure(probe)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_probe_ending_in_other_error_frees_the_slot():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    breaker.record_failure(False)
+    expire(breaker)
+    breaker.record_other(breaker.before_call())
+    assert breaker.before_call() is True
+
+
+@pytest.mark.anyio
+async def test_execute_with_retry_retries_operational_errors(monkeypatch):
+    monkeypatch.setattr(resilience, "breaker", CircuitBreaker(threshold=5))
+    monkeypatch.setattr(resilience, "DB_RETRY_BASE_DELAY", 0)
+    calls = []
+
+    async def flaky(db):
+        calls.append(db)
+        if len(calls) < 3:
+            raise OperationalError("SELECT 1", {}, Exception("conexión perdida"))
+        return "ok"
+
+    with SessionLocal() as db:
+        assert await execute_with_retry(flaky, db) == "ok"
+    assert len(calls) == 3
+    assert resilience.breaker.failures == 0